@@ -1,73 +1,247 @@
-from queue import PriorityQueue
+import heapq
+import math
+from array import array
 
-from geometry import pdist, Point
+import numpy as np
 
+from geometry import Point
 
-def successors(world, src, impassable=None):
+
+SQRT2 = math.sqrt(2)
+
+METHOD_ASTAR = 'astar'
+METHOD_JPS = 'jps'
+METHOD_HPA = 'hpa'
+
+
+# Boolean array of the cells that can be moved to, indexed [y, x].
+# `impassable` is either a string of impassable tile characters or a
+# character, whose class decides.
+def passable_mask(world, impassable=None):
     if impassable is None:
         impassable = ''
+    if isinstance(impassable, str):
+        return world.passable_mask(impassable)
+    return impassable.passable_mask(world)
+
+
+def octile(dx, dy):
+    dx, dy = abs(dx), abs(dy)
+    return (SQRT2 - 1) * min(dx, dy) + max(dx, dy)
 
-    height = len(world.MAP)
-    width = len(world.MAP[0])
 
-    def valid_successor(p):
-        if p.x == src.x and p.y == src.y:
-            return False
-        if p.x < 0 or p.y < 0 or p.x >= width or p.y >= height:
-            return False
+def _reconstruct_path(parent, height, src_idx, dst_idx):
+    path = []
+    idx = dst_idx
+    while idx != src_idx:
+        path.append(Point(*divmod(idx, height)))
+        idx = parent[idx]
+    path.append(Point(*divmod(src_idx, height)))
+    path.reverse()
+    return path
 
-        if isinstance(impassable, str):
-            return world.MAP[p.y][p.x] not in impassable
-        elif isinstance(impassable, object):
-            return impassable.can_move_to(world, p)
 
-    successors = [Point(x, y) for x in range(src.x-1, src.x+2)
-                  for y in range(src.y-1, src.y+2)]
+def find_path_astar(world, src, dst, impassable=None, within=0,
+                    method=METHOD_ASTAR, stats=None):
+    if method == METHOD_JPS:
+        return find_path_jps(world, src, dst, impassable, within, stats)
+    elif method == METHOD_HPA:
+        if impassable is None:
+            impassable = ''
+        return world.path_hierarchy(impassable).find_path(src, dst, within,
+                                                          stats)
+    elif method != METHOD_ASTAR:
+        raise ValueError(f"Unknown pathfinding method: {method}")
 
-    successors = list(filter(valid_successor, successors))
-    return successors
+    width = world.WIDTH_TILES
+    height = world.HEIGHT_TILES
+    ncells = width * height
+    sqrt = math.sqrt
+    heappush = heapq.heappush
+    heappop = heapq.heappop
 
+    # Cells are indexed column-major, so that heap entries with equal cost
+    # are popped in the same (x, y) order as Points would be.
+    passable = passable_mask(world, impassable).T.tobytes()
+    cost = array('d', bytes(8 * ncells))
+    parent = array('l', bytes(array('l').itemsize * ncells))
+    seen = bytearray(ncells)
 
-def visit(visited, pos, parent=None):
-    visited[pos.y][pos.x] = {}
-    visited[pos.y][pos.x]['cost'] = 0
-    visited[pos.y][pos.x]['parent'] = parent
-    if parent is not None:
-        visited[pos.y][pos.x]['cost'] = visited[parent.y][parent.x]['cost'] + \
-            pdist(parent, pos)
+    dstx, dsty = dst.x, dst.y
+    src_idx = src.x * height + src.y
+    seen[src_idx] = 1
+    fringe = [(0, src_idx)]
+    expanded = 0
+    while fringe:
+        _priority, idx = heappop(fringe)
+        x, y = divmod(idx, height)
+        if sqrt((x - dstx)**2 + (y - dsty)**2) <= within:
+            if stats is not None:
+                stats['expanded'] = expanded
+            return _reconstruct_path(parent, height, src_idx, idx)
+        expanded += 1
 
+        pcost = cost[idx]
+        for sx in (x - 1, x, x + 1):
+            if sx < 0 or sx >= width:
+                continue
+            for sy in (y - 1, y, y + 1):
+                if sy < 0 or sy >= height:
+                    continue
+                succ = sx * height + sy
+                if seen[succ] or not passable[succ]:
+                    continue
 
-def reconstruct_path(visited, src, dst):
-    pos = Point(dst.x, dst.y)
-    path = [pos]
-    while pos != src:
-        pos = visited[pos.y][pos.x]['parent']
-        path.append(pos)
-    path.reverse()
+                seen[succ] = 1
+                parent[succ] = idx
+                gcost = pcost + (1.0 if sx == x or sy == y else SQRT2)
+                cost[succ] = gcost
+                heappush(fringe, (gcost + sqrt((sx - dstx)**2 +
+                                               (sy - dsty)**2), succ))
+    if stats is not None:
+        stats['expanded'] = expanded
+    return None
+
+
+def _interpolate_path(jump_points):
+    path = [jump_points[0]]
+    for point in jump_points[1:]:
+        x, y = path[-1].x, path[-1].y
+        dx = (point.x > x) - (point.x < x)
+        dy = (point.y > y) - (point.y < y)
+        while (x, y) != (point.x, point.y):
+            x += dx
+            y += dy
+            path.append(Point(x, y))
     return path
 
 
-def find_path_astar(world, src, dst, impassable=None, within=0):
-    if impassable is None:
-        impassable = ''
+# Jump Point Search over the same 8-connected, uniform-cost grid that
+# find_path_astar searches. Diagonal moves may cut corners, as they may in
+# find_path_astar. The result is a shortest path, listed cell by cell.
+def find_path_jps(world, src, dst, impassable=None, within=0, stats=None):
+    width = world.WIDTH_TILES
+    height = world.HEIGHT_TILES
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+
+    # Cells are indexed row-major with a blocked border, so that jumps can
+    # probe neighbours without bounds checks.
+    stride = width + 2
+    ncells = stride * (height + 2)
+    free = np.pad(passable_mask(world, impassable), 1).tobytes()
+
+    # Every cell within `within` of dst is a goal.
+    goal = bytearray(ncells)
+    radius = int(within)
+    for y in range(max(0, dst.y - radius), min(height, dst.y + radius + 1)):
+        for x in range(max(0, dst.x - radius),
+                       min(width, dst.x + radius + 1)):
+            if math.sqrt((x - dst.x)**2 + (y - dst.y)**2) <= within:
+                goal[(y + 1) * stride + x + 1] = 1
+
+    # The octile distance to dst is discounted by the most it can exceed
+    # the goal radius, so that it never overestimates.
+    slack = within * math.sqrt(4 - 2 * SQRT2)
+
+    def jump(idx, dx, dy):
+        step = dx + dy * stride
+        while True:
+            idx += step
+            if not free[idx]:
+                return None
+            if goal[idx]:
+                return idx
+            if dx and dy:
+                if (not free[idx - dx] and free[idx - dx + dy * stride]) or \
+                        (not free[idx - dy * stride] and
+                         free[idx + dx - dy * stride]):
+                    return idx
+                if jump(idx, dx, 0) is not None or \
+                        jump(idx, 0, dy) is not None:
+                    return idx
+            elif dx:
+                if (not free[idx + stride] and free[idx + stride + dx]) or \
+                        (not free[idx - stride] and free[idx - stride + dx]):
+                    return idx
+            else:
+                if (not free[idx + 1] and free[idx + 1 + step]) or \
+                        (not free[idx - 1] and free[idx - 1 + step]):
+                    return idx
+
+    def directions(idx, dx, dy):
+        if dx and dy:
+            dirs = [(dx, 0), (0, dy), (dx, dy)]
+            if not free[idx - dx]:
+                dirs.append((-dx, dy))
+            if not free[idx - dy * stride]:
+                dirs.append((dx, -dy))
+        elif dx:
+            dirs = [(dx, 0)]
+            if not free[idx + stride]:
+                dirs.append((dx, 1))
+            if not free[idx - stride]:
+                dirs.append((dx, -1))
+        else:
+            dirs = [(0, dy)]
+            if not free[idx + 1]:
+                dirs.append((1, dy))
+            if not free[idx - 1]:
+                dirs.append((-1, dy))
+        return dirs
 
-    visited = [[False for x in range(world.WIDTH_TILES)]
-               for y in range(world.HEIGHT_TILES)]
-    visit(visited, src)
-    fringe = PriorityQueue()
-    fringe.put((0, src))
-    while not fringe.empty():
-        (_priority, pos) = fringe.get()
-        if pdist(pos, dst) <= within:
+    all_directions = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                      if dx or dy]
+
+    cost = array('d', [math.inf]) * ncells
+    parent = array('l', bytes(array('l').itemsize * ncells))
+    closed = bytearray(ncells)
+
+    src_idx = (src.y + 1) * stride + src.x + 1
+    cost[src_idx] = 0
+    fringe = [(0, src_idx)]
+    expanded = 0
+    while fringe:
+        _priority, idx = heappop(fringe)
+        if closed[idx]:
+            continue
+        closed[idx] = 1
+        y, x = divmod(idx, stride)
+        if goal[idx]:
             break
-        succs = successors(world, pos, impassable)
-        for succ in succs:
-            if not visited[succ.y][succ.x]:
-                visit(visited, succ, pos)
-                hcost = visited[succ.y][succ.x]['cost'] + \
-                    pdist(succ, dst)
-                fringe.put((hcost, succ))
-    if pdist(pos, dst) <= within:
-        return reconstruct_path(visited, src, pos)
+        expanded += 1
+
+        if idx == src_idx:
+            dirs = all_directions
+        else:
+            py, px = divmod(parent[idx], stride)
+            dirs = directions(idx, (x > px) - (x < px), (y > py) - (y < py))
+        gcost = cost[idx]
+        for dx, dy in dirs:
+            succ = jump(idx, dx, dy)
+            if succ is None or closed[succ]:
+                continue
+            sy, sx = divmod(succ, stride)
+            succ_cost = gcost + octile(sx - x, sy - y)
+            if succ_cost < cost[succ]:
+                cost[succ] = succ_cost
+                parent[succ] = idx
+                hcost = max(0, octile(sx - 1 - dst.x, sy - 1 - dst.y) -
+                            slack)
+                heappush(fringe, (succ_cost + hcost, succ))
     else:
+        idx = None
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    if idx is None:
         return None
+
+    jump_points = []
+    while idx != src_idx:
+        jump_points.append(idx)
+        idx = parent[idx]
+    jump_points.append(src_idx)
+    jump_points.reverse()
+    return _interpolate_path([Point(idx % stride - 1, idx // stride - 1)
+                              for idx in jump_points])
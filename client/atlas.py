@@ -0,0 +1,160 @@
+import hashlib
+import json
+import math
+import os
+import struct
+
+import pygame as pg
+
+from files import write_atomically
+
+
+# All the game's sprites packed into one surface, as a grid of tile sized
+# frames numbered from 0. A name stands for a run of frames, the frames of
+# its spritesheet, each followed by its mirror image if the asset is
+# mirrored. Drawing looks up a frame's rect by its number.
+#
+# Atlases are kept in ASSET_CACHE_DIR once built, under a hash of their
+# source files, so that startup reads one file instead of decoding, slicing
+# and flipping every PNG.
+
+ASSET_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache',
+                               'multiplayer-test')
+
+# Frames in a row of the atlas.
+ATLAS_COLUMNS = 16
+
+# Changing the layout or the file format must change this, so that old
+# cache files are not used.
+ATLAS_VERSION = b'atlas 1'
+
+
+class Atlas:
+    def __init__(self, surface, names, tile_width, tile_height):
+        self.surface = surface
+        # The first frame and number of frames of each name.
+        self.names = names
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        frames = sum(count for _first, count in names.values())
+        self.rects = [pg.rect.Rect((i % ATLAS_COLUMNS) * tile_width,
+                                   (i // ATLAS_COLUMNS) * tile_height,
+                                   tile_width, tile_height)
+                      for i in range(frames)]
+
+    # The number of a frame of a name.
+    def index(self, name, frame=0):
+        first, count = self.names[name]
+        if not 0 <= frame < count:
+            raise IndexError(f"{name} has no frame {frame}")
+        return first + frame
+
+    # The same atlas with frames of the given size.
+    def scaled(self, tile_width, tile_height):
+        if (tile_width, tile_height) == (self.tile_width, self.tile_height):
+            return self
+        surface = pg.transform.scale(self.surface, (
+            self.surface.get_width() // self.tile_width * tile_width,
+            self.surface.get_height() // self.tile_height * tile_height))
+        return Atlas(surface, self.names, tile_width, tile_height)
+
+
+def _asset_name(asset):
+    return asset if isinstance(asset, str) else asset['name']
+
+
+def _asset_path(assets_path, asset):
+    return os.path.join(assets_path, f"{_asset_name(asset)}.png")
+
+
+# Slices the spritesheets of assets into frames and packs them.
+def build_atlas(assets, assets_path, tile_width, tile_height):
+    frames = []
+    names = {}
+    for asset in assets:
+        name = _asset_name(asset)
+        try:
+            surface = pg.image.load(_asset_path(assets_path, asset))
+        except pg.error:
+            raise SystemExit(f"Failed to load asset {name}: "
+                             f"{pg.get_error()}")
+        tiles = isinstance(asset, dict) and asset.get('tiles')
+        mirror = isinstance(asset, dict) and asset.get('mirror')
+        first = len(frames)
+        for i in range(surface.get_width() // tile_width if tiles else 1):
+            r = pg.rect.Rect(i * tile_width, 0, tile_width, tile_height)
+            frame = surface.subsurface(r)
+            frames.append(frame)
+            if mirror:
+                frames.append(pg.transform.flip(frame, True, False))
+        names[name] = (first, len(frames) - first)
+
+    rows = max(1, math.ceil(len(frames) / ATLAS_COLUMNS))
+    surface = pg.Surface((ATLAS_COLUMNS * tile_width, rows * tile_height),
+                         pg.SRCALPHA)
+    atlas = Atlas(surface, names, tile_width, tile_height)
+    for frame, rect in zip(frames, atlas.rects):
+        surface.blit(frame, rect)
+    return atlas
+
+
+# A hash of everything an atlas is built from.
+def atlas_key(assets, assets_path, tile_width, tile_height):
+    h = hashlib.sha256(ATLAS_VERSION)
+    h.update(json.dumps([assets, tile_width, tile_height],
+                        sort_keys=True).encode())
+    for asset in assets:
+        with open(_asset_path(assets_path, asset), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+# An atlas file is the length of a JSON header, the header and the atlas's
+# pixels as RGBA.
+def save_atlas(atlas, path):
+    header = json.dumps({
+        'size': atlas.surface.get_size(),
+        'tile_size': (atlas.tile_width, atlas.tile_height),
+        'names': atlas.names,
+    }).encode()
+    pixels = pg.image.tostring(atlas.surface, 'RGBA')
+    write_atomically(path, struct.pack('<I', len(header)), header, pixels)
+
+
+def read_atlas(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    length, = struct.unpack_from('<I', data)
+    header = json.loads(data[4:4 + length])
+    surface = pg.image.fromstring(data[4 + length:], tuple(header['size']),
+                                  'RGBA')
+    names = {name: tuple(run) for name, run in header['names'].items()}
+    return Atlas(surface, names, *header['tile_size'])
+
+
+# The atlas of assets, from the cache if it was built from the same files
+# before. The cache is only an optimization: if it cannot be read or
+# written, the atlas is built as if there were none.
+def load_atlas(assets, assets_path, tile_width, tile_height,
+               cache_dir=ASSET_CACHE_DIR):
+    key = atlas_key(assets, assets_path, tile_width, tile_height)
+    path = os.path.join(cache_dir, f"atlas-{key}.bin")
+    try:
+        atlas = read_atlas(path)
+    except (OSError, ValueError, KeyError, struct.error, pg.error):
+        atlas = build_atlas(assets, assets_path, tile_width, tile_height)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            _remove_atlases(cache_dir)
+            save_atlas(atlas, path)
+        except OSError:
+            pass
+    atlas.surface = atlas.surface.convert_alpha()
+    return atlas
+
+
+# Atlases built from earlier versions of the assets.
+def _remove_atlases(cache_dir):
+    for filename in os.listdir(cache_dir):
+        if filename.startswith('atlas-'):
+            os.remove(os.path.join(cache_dir, filename))
@@ -0,0 +1,148 @@
+import argparse
+import random
+import time
+from queue import PriorityQueue
+
+from astar import find_path_astar
+from geometry import pdist, Point
+from mapgen import generate_cells, random_empty_cell
+from player import Player
+from world import World
+
+
+# The PriorityQueue/dict-per-cell implementation find_path_astar replaced,
+# kept as the baseline the new engine is compared against. It reads the
+# ASCII rows of the map, which are taken once per search.
+def legacy_successors(world, rows, src, impassable=None):
+    if impassable is None:
+        impassable = ''
+
+    height = len(rows)
+    width = len(rows[0])
+
+    def valid_successor(p):
+        if p.x == src.x and p.y == src.y:
+            return False
+        if p.x < 0 or p.y < 0 or p.x >= width or p.y >= height:
+            return False
+
+        if isinstance(impassable, str):
+            return rows[p.y][p.x] not in impassable
+        elif isinstance(impassable, object):
+            return impassable.can_move_to(world, p)
+
+    successors = [Point(x, y) for x in range(src.x-1, src.x+2)
+                  for y in range(src.y-1, src.y+2)]
+
+    successors = list(filter(valid_successor, successors))
+    return successors
+
+
+def legacy_visit(visited, pos, parent=None):
+    visited[pos.y][pos.x] = {}
+    visited[pos.y][pos.x]['cost'] = 0
+    visited[pos.y][pos.x]['parent'] = parent
+    if parent is not None:
+        visited[pos.y][pos.x]['cost'] = visited[parent.y][parent.x]['cost'] + \
+            pdist(parent, pos)
+
+
+def legacy_reconstruct_path(visited, src, dst):
+    pos = Point(dst.x, dst.y)
+    path = [pos]
+    while pos != src:
+        pos = visited[pos.y][pos.x]['parent']
+        path.append(pos)
+    path.reverse()
+    return path
+
+
+def legacy_find_path_astar(world, src, dst, impassable=None, within=0):
+    if impassable is None:
+        impassable = ''
+
+    rows = world.MAP
+    visited = [[False for x in range(world.WIDTH_TILES)]
+               for y in range(world.HEIGHT_TILES)]
+    legacy_visit(visited, src)
+    fringe = PriorityQueue()
+    fringe.put((0, src))
+    while not fringe.empty():
+        (_priority, pos) = fringe.get()
+        if pdist(pos, dst) <= within:
+            break
+        succs = legacy_successors(world, rows, pos, impassable)
+        for succ in succs:
+            if not visited[succ.y][succ.x]:
+                legacy_visit(visited, succ, pos)
+                hcost = visited[succ.y][succ.x]['cost'] + \
+                    pdist(succ, dst)
+                fringe.put((hcost, succ))
+    if pdist(pos, dst) <= within:
+        return legacy_reconstruct_path(visited, src, pos)
+    else:
+        return None
+
+
+def make_world(width, height, rng):
+    cells = generate_cells(width, height, rng)
+    rows = [''.join('#' if cell else '.'
+                    for cell in cells[y * width:(y + 1) * width])
+            for y in range(height)]
+    return World(rows), cells
+
+
+def make_queries(cells, width, height, nqueries, rng):
+    queries = []
+    for _i in range(nqueries):
+        src = Point(*random_empty_cell(cells, width, height, rng))
+        dst = Point(*random_empty_cell(cells, width, height, rng))
+        queries.append((src, dst))
+    return queries
+
+
+def time_queries(pathfinder, world, queries, impassable):
+    paths = []
+    start = time.perf_counter()
+    for src, dst in queries:
+        paths.append(pathfinder(world, src, dst, impassable))
+    return time.perf_counter() - start, paths
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare find_path_astar against the legacy engine.")
+    parser.add_argument('--size', type=int, nargs='+', default=[30, 100])
+    parser.add_argument('--maps', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'size':>8} {'passability':>12} {'legacy ms':>10} "
+          f"{'new ms':>10} {'speedup':>8}  paths")
+    for size in args.size:
+        for impassable in ['#', Player(Point(0, 0), None)]:
+            legacy_total, new_total, identical = 0, 0, True
+            for _m in range(args.maps):
+                world, cells = make_world(size, size, rng)
+                queries = make_queries(cells, size, size, args.queries, rng)
+                legacy_time, legacy_paths = time_queries(
+                    legacy_find_path_astar, world, queries, impassable)
+                new_time, new_paths = time_queries(
+                    find_path_astar, world, queries, impassable)
+                legacy_total += legacy_time
+                new_total += new_time
+                identical = identical and legacy_paths == new_paths
+
+            nqueries = args.maps * args.queries
+            kind = 'str' if isinstance(impassable, str) else 'Character'
+            print(f"{size}x{size:<4} {kind:>12} "
+                  f"{1000 * legacy_total / nqueries:>10.3f} "
+                  f"{1000 * new_total / nqueries:>10.3f} "
+                  f"{legacy_total / new_total:>7.1f}x  "
+                  f"{'identical' if identical else 'DIFFERENT'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import random
+import time
+
+from astar import find_path_astar
+from bench_astar import make_world
+from flowfield import FlowField
+from geometry import Point
+from mapgen import random_empty_cell
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare per-agent A* with a shared flow field.")
+    parser.add_argument('--size', type=int, nargs='+', default=[30, 100])
+    parser.add_argument('--agents', type=int, nargs='+',
+                        default=[1, 10, 50])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'size':>8} {'agents':>6} {'astar ms/tick':>14} "
+          f"{'field ms/tick':>14}")
+    for size in args.size:
+        world, cells = make_world(size, size, rng)
+        goal = Point(*random_empty_cell(cells, size, size, rng))
+        for nagents in args.agents:
+            agents = [Point(*random_empty_cell(cells, size, size, rng))
+                      for _a in range(nagents)]
+
+            start = time.perf_counter()
+            for pos in agents:
+                find_path_astar(world, pos, goal, '#')
+            astar_time = time.perf_counter() - start
+
+            # A tick where the goal moved: rebuild the field once, then
+            # every agent looks up its next step.
+            field = FlowField(world, '#')
+            start = time.perf_counter()
+            field.update(goal)
+            for pos in agents:
+                field.next_step(pos)
+            field_time = time.perf_counter() - start
+
+            print(f"{size}x{size:<4} {nagents:>6} "
+                  f"{1000 * astar_time:>14.3f} {1000 * field_time:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import math
+import random
+import time
+
+from astar import METHOD_ASTAR, METHOD_HPA, METHOD_JPS
+from bench_astar import make_queries, make_world
+from bench_jps import run_method
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare flat and hierarchical path-finding.")
+    parser.add_argument('--size', type=int, nargs='+',
+                        default=[100, 200, 400])
+    parser.add_argument('--maps', type=int, default=3)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    methods = [METHOD_ASTAR, METHOD_JPS, METHOD_HPA]
+    print(f"{'size':>8} {'method':>6} {'build ms':>9} {'ms/path':>8} "
+          f"{'expanded/path':>14} {'mean cost':>10}")
+    for size in args.size:
+        totals = {method: [0, 0, 0, []] for method in methods}
+        for _m in range(args.maps):
+            world, cells = make_world(size, size, rng)
+            queries = make_queries(cells, size, size, args.queries, rng)
+
+            start = time.perf_counter()
+            world.path_hierarchy('#').update()
+            totals[METHOD_HPA][0] += time.perf_counter() - start
+
+            for method, total in totals.items():
+                elapsed, expanded, costs = run_method(world, queries, method)
+                total[1] += elapsed
+                total[2] += expanded
+                total[3].extend(costs)
+
+        nqueries = args.maps * args.queries
+        for method, (build, elapsed, expanded, costs) in totals.items():
+            reachable = [cost for cost in costs if cost != math.inf]
+            mean_cost = sum(reachable) / max(1, len(reachable))
+            print(f"{size}x{size:<4} {method:>6} "
+                  f"{1000 * build / args.maps:>9.1f} "
+                  f"{1000 * elapsed / nqueries:>8.3f} "
+                  f"{expanded / nqueries:>14.1f} {mean_cost:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import math
+import random
+import time
+
+from astar import find_path_astar, METHOD_ASTAR, METHOD_JPS
+from bench_astar import make_queries, make_world
+from geometry import pdist
+
+
+def path_cost(path):
+    return sum(pdist(p1, p2) for p1, p2 in zip(path, path[1:]))
+
+
+def run_method(world, queries, method):
+    expanded, costs = 0, []
+    start = time.perf_counter()
+    for src, dst in queries:
+        stats = {}
+        path = find_path_astar(world, src, dst, '#', method=method,
+                               stats=stats)
+        expanded += stats['expanded']
+        costs.append(path_cost(path) if path is not None else math.inf)
+    return time.perf_counter() - start, expanded, costs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare A* and Jump Point Search on StartGame maps.")
+    parser.add_argument('--size', type=int, nargs='+', default=[30, 100])
+    parser.add_argument('--maps', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'size':>8} {'method':>6} {'ms/path':>8} {'expanded/path':>14} "
+          f"{'mean cost':>10}")
+    for size in args.size:
+        totals = {METHOD_ASTAR: [0, 0, []], METHOD_JPS: [0, 0, []]}
+        for _m in range(args.maps):
+            world, cells = make_world(size, size, rng)
+            queries = make_queries(cells, size, size, args.queries, rng)
+            for method, total in totals.items():
+                elapsed, expanded, costs = run_method(world, queries, method)
+                total[0] += elapsed
+                total[1] += expanded
+                total[2].extend(costs)
+
+        nqueries = args.maps * args.queries
+        for method, (elapsed, expanded, costs) in totals.items():
+            reachable = [cost for cost in costs if cost != math.inf]
+            mean_cost = sum(reachable) / max(1, len(reachable))
+            print(f"{size}x{size:<4} {method:>6} "
+                  f"{1000 * elapsed / nqueries:>8.3f} "
+                  f"{expanded / nqueries:>14.1f} {mean_cost:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import grpc
+import numpy as np
+
+import game_pb2
+import game_pb2_grpc
+from connection import SERVER_ADDRESS
+from geometry import Direction
+from map import decode_map
+from player import Player
+from simulation import Simulation
+
+
+# Simulated clients that wander with NPC.move_randomly or walk to random
+# goals with find_path_astar, sending each move to the server with
+# PlayGame. All bots share one event loop, so path-finding for many of them
+# delays their calls. For large runs, start several processes.
+
+BOT_TICK_INTERVAL = 0.1
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.request_bytes = {}
+        self.response_bytes = {}
+        self.errors = {}
+
+    def record(self, method, latency, request, response):
+        self.latencies.setdefault(method, []).append(latency)
+        self.request_bytes.setdefault(method, []).append(request.ByteSize())
+        self.response_bytes.setdefault(method, []).append(
+            response.ByteSize())
+
+    def record_error(self, method, error):
+        key = f"{method} {error.code().name}"
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+    def report(self, elapsed):
+        methods = {}
+        for method, latencies in self.latencies.items():
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+            methods[method] = {
+                'calls': len(latencies),
+                'calls_per_second': len(latencies) / elapsed,
+                'latency_ms': {
+                    'mean': float(np.mean(latencies) * 1000),
+                    'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+                    'max': float(np.max(latencies) * 1000),
+                },
+                'request_bytes': float(np.mean(self.request_bytes[method])),
+                'response_bytes': float(
+                    np.mean(self.response_bytes[method])),
+            }
+        return {'elapsed_s': elapsed, 'methods': methods,
+                'errors': self.errors}
+
+
+async def call(stats, method, rpc, request, timeout):
+    start = time.perf_counter()
+    try:
+        response = await rpc(request, timeout=timeout)
+    except grpc.aio.AioRpcError as error:
+        stats.record_error(method, error)
+        return None
+    stats.record(method, time.perf_counter() - start, request, response)
+    return response
+
+
+async def run_bot(stub, stats, game_id, player_id, args, deadline, rng):
+    request = game_pb2.PlayGameRequest(game_id=game_id)
+    response = await call(stats, 'PlayGame', stub.PlayGame, request,
+                          args.timeout)
+    if response is None:
+        return
+    game = Simulation(game_id, decode_map(response.game_state.world_map))
+    world = game.world
+    bot = Player(world.random_point(), Direction.DOWN)
+    while not bot.can_move_to(world, bot.pos):
+        bot.pos = world.random_point()
+    area = game_pb2.AreaOfInterest(
+        player_id=player_id,
+        view_size=game_pb2.Size(width=args.view[0], height=args.view[1]))
+
+    path = []
+    sequence = 0
+    loop = asyncio.get_running_loop()
+    # Spread the bots over the tick so that they do not call in lockstep.
+    next_tick = loop.time() + rng.random() * args.tick_interval
+    while loop.time() < deadline:
+        await asyncio.sleep(max(0, next_tick - loop.time()))
+        next_tick += args.tick_interval
+
+        if path:
+            bot.move_to(path.pop(0))
+        elif rng.random() < args.path_probability:
+            path = bot.find_path_astar(world, world.random_point()) or []
+            path = path[1:]
+        else:
+            bot.move_randomly(game)
+
+        sequence += 1
+        position = game_pb2.Position(x=bot.pos.x, y=bot.pos.y,
+                                     facing=bot.facing.value)
+        request = game_pb2.PlayGameRequest(
+            game_id=game_id,
+            player_state_update=game_pb2.PlayerState(
+                player_id=player_id, position=position,
+                input_sequence=sequence),
+            area_of_interest=area if args.area_of_interest else None)
+        await call(stats, 'PlayGame', stub.PlayGame, request, args.timeout)
+
+
+async def run(args):
+    stats = Stats()
+    rng = random.Random(args.seed)
+    async with grpc.aio.insecure_channel(args.address) as channel:
+        stub = game_pb2_grpc.GameStub(channel)
+        game_id = args.game_id
+        if game_id is None:
+            request = game_pb2.StartGameRequest(
+                world_size=game_pb2.Size(width=args.size, height=args.size))
+            response = await call(stats, 'StartGame', stub.StartGame,
+                                  request, args.timeout)
+            if response is None:
+                raise SystemExit(f"StartGame failed: {stats.errors}")
+            game_id = response.game_id
+
+        start = time.perf_counter()
+        deadline = asyncio.get_running_loop().time() + args.duration
+        await asyncio.gather(*[
+            run_bot(stub, stats, game_id, args.first_player_id + i, args,
+                    deadline, random.Random(rng.random()))
+            for i in range(args.bots)])
+        elapsed = time.perf_counter() - start
+
+    report = stats.report(elapsed)
+    report['config'] = {
+        'address': args.address, 'game_id': game_id, 'bots': args.bots,
+        'duration_s': args.duration, 'tick_interval_s': args.tick_interval,
+        'area_of_interest': args.area_of_interest,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load a game server with simulated players and report "
+                    "RPC latency, throughput and payload sizes as JSON.")
+    parser.add_argument('--address', default=SERVER_ADDRESS)
+    parser.add_argument('--game-id', type=int,
+                        help="join this game rather than starting one")
+    parser.add_argument('--size', type=int, default=30,
+                        help="width and height of a started game")
+    parser.add_argument('--bots', type=int, default=10)
+    parser.add_argument('--first-player-id', type=int, default=1)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--tick-interval', type=float,
+                        default=BOT_TICK_INTERVAL)
+    parser.add_argument('--path-probability', type=float, default=0.2,
+                        help="chance of walking to a random goal rather "
+                             "than wandering, each time a path ends")
+    parser.add_argument('--area-of-interest', action='store_true')
+    parser.add_argument('--view', type=int, nargs=2, default=[21, 16],
+                        metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('--timeout', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import random
+import time
+
+import game_pb2
+from map import decode_map
+from mapgen import generate_cells, MAP_HEIGHT_MAX, MAP_HEIGHT_MIN
+from world import World
+
+
+# decode_map as it was, building the ASCII rows one cell at a time.
+def legacy_decode_map(world_map):
+    world_size = world_map.map_size
+
+    cells = world_map.cells
+    assert len(cells) == world_size.width * world_size.height
+    idx = 0
+    output = ''
+    for y in range(world_size.height):
+        for x in range(world_size.width):
+            if cells[idx] == 0:
+                output += '.'
+            else:
+                output += '#'
+            idx += 1
+        output += '\n'
+    return output.splitlines()
+
+
+def make_map(size, rng):
+    world_map = game_pb2.Map(map_size=game_pb2.Size(width=size, height=size))
+    world_map.cells.extend(generate_cells(size, size, rng))
+    # Decode what a client would receive off the wire.
+    return game_pb2.Map.FromString(world_map.SerializeToString())
+
+
+def time_decode(decode, world_map, repeat, build_world):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        m = decode(world_map)
+        if build_world:
+            World(m)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the legacy and vectorized Map decoders.")
+    parser.add_argument('--size', type=int, nargs='+',
+                        default=list(range(MAP_HEIGHT_MIN,
+                                           MAP_HEIGHT_MAX + 1, 10)))
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--world', action='store_true',
+                        help="include building the World from the result")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'size':>8} {'legacy ms':>10} {'new ms':>8} {'speedup':>8}")
+    for size in args.size:
+        world_map = make_map(size, rng)
+        legacy = World(legacy_decode_map(world_map)).terrain
+        assert (World(decode_map(world_map)).terrain == legacy).all()
+
+        legacy_time = time_decode(legacy_decode_map, world_map, args.repeat,
+                                  args.world)
+        new_time = time_decode(decode_map, world_map, args.repeat,
+                               args.world)
+        print(f"{f'{size}x{size}':>8} {legacy_time * 1000:10.3f} "
+              f"{new_time * 1000:8.3f} {legacy_time / new_time:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
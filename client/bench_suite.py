@@ -0,0 +1,360 @@
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import grpc
+import numpy as np
+import pygame as pg
+
+import game_pb2
+import game_pb2_grpc
+from astar import find_path_astar
+from geometry import Direction, Point
+from main import Game, GameController, SCREENRECT
+from map import decode_map, get_map, MapCache
+from mapgen import generate_cells, random_empty_cell, MAP_HEIGHT_MAX, \
+    MAP_HEIGHT_MIN, MAP_WIDTH_MAX, MAP_WIDTH_MIN
+from player import Player
+from world import World
+
+
+# Times the client's hot paths on generated maps of several sizes, headless,
+# printing the times as it goes and writing them to --output as JSON. With
+# --baseline, the results are compared against those of an earlier run and
+# the benchmarks that got slower are reported, with a non-zero exit status
+# if there are any. Compare runs made on the same machine only.
+#
+# The get_map benchmarks need a server. Unless --server is given, the
+# stand-in in local_server.py is started for the run, in a process of its
+# own so that it does not compete with the client for the GIL. Sizes the
+# server does not allow are skipped for them.
+
+DEFAULT_SIZES = [10, 25, 50, 100, 200]
+
+# Paths searched per call of the find_path_astar benchmark.
+PATH_QUERIES = 10
+
+# NPCs wandering about in the GameController.tick benchmark, which moves
+# the player in a random direction each tick.
+BENCH_NPCS = 20
+
+# Each benchmark is called in batches that take at least this many seconds,
+# and the time per call is taken from the fastest of the batches.
+MIN_BATCH_TIME = 0.05
+BATCHES = 5
+
+# How much slower than the baseline a benchmark can get before it counts as
+# a regression. Run to run noise on a desktop is about 10%.
+REGRESSION_THRESHOLD = 0.20
+
+
+def generate_map(size, rng):
+    cells = generate_cells(size, size, rng)
+    return np.array(cells, dtype=np.uint8).reshape(size, size), cells
+
+
+def make_game(size, rng, bench):
+    terrain, cells = generate_map(size, rng)
+    game = Game(bench.screen, map=terrain)
+    game.load_assets(bench.cache_dir)
+    game.world.player.pos = Point(*random_empty_cell(cells, size, size, rng))
+    game.previous_player_pos = game.world.player.pos
+    return game, cells
+
+
+# Each benchmark takes the map size, a random number generator and the
+# Bench it runs in, and returns the function to time, or None if it cannot
+# run at that size.
+
+def bench_find_path_astar(size, rng, bench):
+    terrain, cells = generate_map(size, rng)
+    world = World(terrain)
+    queries = [(Point(*random_empty_cell(cells, size, size, rng)),
+                Point(*random_empty_cell(cells, size, size, rng)))
+               for _ in range(PATH_QUERIES)]
+
+    def run():
+        for src, dst in queries:
+            find_path_astar(world, src, dst, '#')
+    return run
+
+
+def bench_world_init(size, rng, bench):
+    terrain, _cells = generate_map(size, rng)
+    return lambda: World(terrain, Game.N_GROUND_TILES)
+
+
+def bench_decode_map(size, rng, bench):
+    _terrain, cells = generate_map(size, rng)
+    world_map = game_pb2.Map(map_size=game_pb2.Size(width=size, height=size),
+                             cells=cells)
+    # What a client would receive off the wire.
+    world_map = game_pb2.Map.FromString(world_map.SerializeToString())
+    return lambda: decode_map(world_map)
+
+
+def bench_get_map(size, rng, bench, cache=None):
+    game_id = bench.start_game(size)
+    if game_id is None:
+        return None
+    if cache is not None:
+        get_map(game_id, bench.address, cache)
+    return lambda: get_map(game_id, bench.address, cache)
+
+
+# get_map of a map the client has cached, which the server only confirms.
+def bench_get_map_cached(size, rng, bench):
+    return bench_get_map(size, rng, bench, MapCache(bench.cache_dir))
+
+
+# Draws the map as the view pans across it, so that chunks are rendered as
+# they come into view, as well as blitted.
+def bench_render_map(size, rng, bench):
+    game, _cells = make_game(size, rng, bench)
+    # A quarter of a tile at a time, along rows of chunks.
+    origins = [(x / 4 - 4, y - 4) for y in range(0, size, 8)
+               for x in range(4 * size)]
+    frames = iter(())
+
+    def run():
+        nonlocal frames
+        origin = next(frames, None)
+        if origin is None:
+            frames = iter(origins)
+            origin = next(frames)
+        game.render_map(origin)
+    return run
+
+
+def bench_controller_tick(size, rng, bench):
+    game, cells = make_game(size, rng, bench)
+    npcs = []
+    for _ in range(BENCH_NPCS):
+        npc = Player(Point(*random_empty_cell(cells, size, size, rng)),
+                     Direction.DOWN)
+        game.world.add_character(npc)
+        npcs.append(npc)
+
+    def move_npcs(event, timestamp):
+        for npc in npcs:
+            npc.move_randomly(game)
+    game._schedule_event(move_npcs, GameController.MOVE_KEYPRESS_INTERVAL)
+
+    controller = GameController()
+    directions = list(Direction)
+
+    def run():
+        game.move(rng.choice(directions))
+        controller.tick(game, 1000 / 30)
+    return run
+
+
+BENCHMARKS = {
+    'find_path_astar': bench_find_path_astar,
+    'World.__init__': bench_world_init,
+    'decode_map': bench_decode_map,
+    'get_map': bench_get_map,
+    'get_map_cached': bench_get_map_cached,
+    'Game.render_map': bench_render_map,
+    'GameController.tick': bench_controller_tick,
+}
+
+
+def _free_address():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return f"localhost:{s.getsockname()[1]}"
+
+
+# What the benchmarks share: the window, the server and its connection, and
+# a directory for the map and asset caches.
+class Bench:
+    def __init__(self, address=None, seed=0):
+        pg.display.init()
+        pg.font.init()
+        self.screen = pg.display.set_mode(SCREENRECT.size)
+
+        self.server = None
+        if address is None:
+            address = _free_address()
+            self.server = subprocess.Popen(
+                [sys.executable,
+                 os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'local_server.py'),
+                 '--address', address, '--seed', str(seed)],
+                stdout=subprocess.DEVNULL)
+        self.address = address
+        self.channel = grpc.insecure_channel(address)
+        grpc.channel_ready_future(self.channel).result(timeout=10)
+        self.stub = game_pb2_grpc.GameStub(self.channel)
+        self.temporary = tempfile.TemporaryDirectory()
+        self.cache_dir = self.temporary.name
+
+    # Starts a game of size x size on the server, returning its id, or None
+    # if the server does not allow that size.
+    def start_game(self, size):
+        if not MAP_WIDTH_MIN <= size <= MAP_WIDTH_MAX or \
+                not MAP_HEIGHT_MIN <= size <= MAP_HEIGHT_MAX:
+            return None
+        request = game_pb2.StartGameRequest(
+            world_size=game_pb2.Size(width=size, height=size))
+        return self.stub.StartGame(request).game_id
+
+    def close(self):
+        self.channel.close()
+        if self.server is not None:
+            self.server.terminate()
+            self.server.wait()
+        self.temporary.cleanup()
+        pg.quit()
+
+
+def _time_batch(run, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        run()
+    return time.perf_counter() - start
+
+
+# Times run, returning ms per call for each batch and the calls per batch.
+def measure(run, batches=BATCHES, min_batch_time=MIN_BATCH_TIME):
+    calls = 1
+    while True:
+        elapsed = _time_batch(run, calls)
+        if elapsed >= min_batch_time:
+            break
+        calls = max(calls + 1, int(calls * min_batch_time * 1.2 /
+                                   max(elapsed, 1e-9)))
+    times = [_time_batch(run, calls) * 1000 / calls for _ in range(batches)]
+    return times, calls
+
+
+def run_benchmarks(names, sizes, bench, seed, batches, min_batch_time):
+    results = []
+    for name in names:
+        for size in sizes:
+            # Seeded by name and size, so that each benchmark sees the same
+            # map whatever else is run.
+            rng = random.Random(f"{seed} {name} {size}")
+            np.random.seed(rng.randrange(2 ** 32))
+            random.seed(rng.random())
+            run = BENCHMARKS[name](size, rng, bench)
+            if run is None:
+                continue
+            times, calls = measure(run, batches, min_batch_time)
+            results.append({
+                'benchmark': name, 'size': size, 'calls': calls,
+                'min_ms': min(times), 'median_ms': statistics.median(times),
+                'max_ms': max(times),
+            })
+            print(f"{name:>20} {size:>4}x{size:<4} {min(times):10.4f} ms",
+                  file=sys.stderr)
+    return results
+
+
+# Compares the fastest times of results against those of baseline. Returns
+# the rows of the comparison and whether anything got slower by more than
+# threshold.
+def compare(baseline, results, threshold=REGRESSION_THRESHOLD):
+    before = {(r['benchmark'], r['size']): r['min_ms']
+              for r in baseline['results']}
+    rows = []
+    regressed = False
+    for result in results['results']:
+        key = (result['benchmark'], result['size'])
+        after = result['min_ms']
+        if key not in before:
+            rows.append((*key, None, after, None, 'new'))
+            continue
+        change = after / before[key] - 1
+        if change > threshold:
+            status = 'REGRESSION'
+            regressed = True
+        elif change < -threshold:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((*key, before[key], after, change, status))
+    return rows, regressed
+
+
+def print_comparison(rows, file=sys.stdout):
+    print(f"{'benchmark':>20} {'size':>9} {'baseline ms':>12} "
+          f"{'ms':>10} {'change':>8}  status", file=file)
+    for name, size, before, after, change, status in rows:
+        before = f"{before:12.4f}" if before is not None else f"{'-':>12}"
+        change = f"{change:+8.1%}" if change is not None else f"{'-':>8}"
+        print(f"{name:>20} {size:>4}x{size:<4} {before} {after:10.4f} "
+              f"{change}  {status}", file=file)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the client's hot paths and compare the "
+                    "results against a baseline.")
+    parser.add_argument('--benchmark', nargs='+', choices=list(BENCHMARKS),
+                        default=list(BENCHMARKS))
+    parser.add_argument('--size', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--server',
+                        help="address of a running server to use rather "
+                             "than starting local_server.py")
+    parser.add_argument('--batches', type=int, default=BATCHES)
+    parser.add_argument('--min-batch-time', type=float,
+                        default=MIN_BATCH_TIME)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the results to this file")
+    parser.add_argument('--baseline',
+                        help="results of an earlier run to compare against")
+    parser.add_argument('--results',
+                        help="compare these results against the baseline "
+                             "instead of running the benchmarks")
+    parser.add_argument('--threshold', type=float,
+                        default=REGRESSION_THRESHOLD,
+                        help="slowdown, as a fraction, that counts as a "
+                             "regression")
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results) as f:
+            results = json.load(f)
+    else:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        bench = Bench(args.server, args.seed)
+        try:
+            results = {
+                'config': {
+                    'sizes': args.size, 'seed': args.seed,
+                    'batches': args.batches,
+                    'min_batch_time_s': args.min_batch_time,
+                    'server': args.server or 'local_server.py',
+                    'python': sys.version.split()[0],
+                },
+                'results': run_benchmarks(
+                    args.benchmark, args.size, bench, args.seed,
+                    args.batches, args.min_batch_time),
+            }
+        finally:
+            bench.close()
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows, regressed = compare(baseline, results, args.threshold)
+        print_comparison(rows)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import threading
+
+import grpc
+
+import game_pb2_grpc
+
+
+SERVER_ADDRESS = 'localhost:50051'
+
+# How often an idle connection is pinged to keep it open. gRPC servers by
+# default take pings more often than every 5 minutes as abuse, and close
+# the connection with GOAWAY too_many_pings, so this must not be less
+# unless the server is configured to allow it, as local_server.py is.
+KEEPALIVE_TIME_MS = 5 * 60 * 1000
+
+
+class ConnectionSettings:
+    def __init__(self, keepalive_time_ms=KEEPALIVE_TIME_MS,
+                 keepalive_timeout_ms=5000,
+                 deadline=5.0, max_attempts=4, initial_backoff=0.1,
+                 max_backoff=1.0, backoff_multiplier=2,
+                 retryable_status_codes=('UNAVAILABLE',)):
+        self.keepalive_time_ms = keepalive_time_ms
+        self.keepalive_timeout_ms = keepalive_timeout_ms
+        # Default deadline of unary calls, in seconds.
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.backoff_multiplier = backoff_multiplier
+        self.retryable_status_codes = list(retryable_status_codes)
+
+    def channel_options(self):
+        service_config = {
+            'methodConfig': [{
+                'name': [{'service': 'game.Game'}],
+                'retryPolicy': {
+                    'maxAttempts': self.max_attempts,
+                    'initialBackoff': f"{self.initial_backoff}s",
+                    'maxBackoff': f"{self.max_backoff}s",
+                    'backoffMultiplier': self.backoff_multiplier,
+                    'retryableStatusCodes': self.retryable_status_codes,
+                },
+            }],
+        }
+        return [
+            ('grpc.keepalive_time_ms', self.keepalive_time_ms),
+            ('grpc.keepalive_timeout_ms', self.keepalive_timeout_ms),
+            ('grpc.keepalive_permit_without_calls', 1),
+            ('grpc.http2.max_pings_without_data', 0),
+            ('grpc.enable_retries', 1),
+            ('grpc.service_config', json.dumps(service_config)),
+        ]
+
+
+DEFAULT_SETTINGS = ConnectionSettings()
+
+
+# A long-lived channel and Game stub for one server address.
+class Connection:
+    def __init__(self, address, settings=DEFAULT_SETTINGS):
+        self.address = address
+        self.settings = settings
+        self.channel = grpc.insecure_channel(address,
+                                             settings.channel_options())
+        self.stub = game_pb2_grpc.GameStub(self.channel)
+
+    @property
+    def deadline(self):
+        return self.settings.deadline
+
+    def close(self):
+        self.channel.close()
+
+
+# The grpc.aio equivalent of Connection. It belongs to the event loop it
+# was created on.
+class AsyncConnection:
+    def __init__(self, address, settings=DEFAULT_SETTINGS):
+        self.address = address
+        self.settings = settings
+        self.channel = grpc.aio.insecure_channel(address,
+                                                 settings.channel_options())
+        self.stub = game_pb2_grpc.GameStub(self.channel)
+
+    @property
+    def deadline(self):
+        return self.settings.deadline
+
+    async def close(self):
+        await self.channel.close()
+
+
+_connections = {}
+_async_connections = {}
+_lock = threading.Lock()
+
+
+def get_connection(address=SERVER_ADDRESS, settings=DEFAULT_SETTINGS):
+    with _lock:
+        connection = _connections.get(address)
+        if connection is None:
+            connection = Connection(address, settings)
+            _connections[address] = connection
+        return connection
+
+
+def get_async_connection(address=SERVER_ADDRESS, settings=DEFAULT_SETTINGS):
+    key = (asyncio.get_event_loop(), address)
+    connection = _async_connections.get(key)
+    if connection is None:
+        connection = AsyncConnection(address, settings)
+        _async_connections[key] = connection
+    return connection
+
+
+def close_connections():
+    with _lock:
+        for connection in _connections.values():
+            connection.close()
+        _connections.clear()
+
+
+async def close_async_connections():
+    loop = asyncio.get_event_loop()
+    for key in [key for key in _async_connections if key[0] is loop]:
+        await _async_connections.pop(key).close()
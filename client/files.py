@@ -0,0 +1,21 @@
+import os
+
+
+# Writes chunks of bytes to path, under another name first and then moved
+# into place, so that a process reading it meanwhile never sees half a file.
+# If anything fails the partial file is removed and the error raised,
+# leaving path as it was. On Windows that happens whenever path is mapped
+# into memory, as a cached map is while a client is using it.
+def write_atomically(path, *chunks):
+    partial = f"{path}.{os.getpid()}"
+    try:
+        with open(partial, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(partial, path)
+    except BaseException:
+        try:
+            os.remove(partial)
+        except OSError:
+            pass
+        raise
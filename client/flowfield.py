@@ -0,0 +1,104 @@
+import heapq
+import math
+from array import array
+
+from astar import passable_mask, SQRT2
+from geometry import Point
+
+
+NEIGHBOURS = [(dx, dy, SQRT2 if dx and dy else 1.0)
+              for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+
+# A Dijkstra map from a goal over the whole World grid. Any number of
+# characters sharing the goal can look up their next step in constant time,
+# and the field is only rebuilt when the goal moves or the map changes.
+class FlowField:
+    def __init__(self, world, impassable=None):
+        if impassable is None:
+            impassable = ''
+        self.world = world
+        self.impassable = impassable
+        self.width = world.WIDTH_TILES
+        self.height = world.HEIGHT_TILES
+        self.goal = None
+        self.within = None
+        self.map_version = None
+        self.builds = 0
+
+        ncells = self.width * self.height
+        self.distance = array('d', [math.inf]) * ncells
+        # Index of the cell to step to, or -1 for none.
+        self.next = array('l', [-1]) * ncells
+
+    def update(self, goal, within=0):
+        if goal == self.goal and within == self.within and \
+                self.map_version == self.world.map_version:
+            return False
+        self._build(goal, within)
+        return True
+
+    def _build(self, goal, within):
+        width, height = self.width, self.height
+        ncells = width * height
+        passable = passable_mask(self.world, self.impassable).tobytes()
+        distance = array('d', [math.inf]) * ncells
+        nxt = array('l', [-1]) * ncells
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        # Every open cell within `within` of the goal is a sink.
+        fringe = []
+        radius = int(within)
+        for y in range(max(0, goal.y - radius),
+                       min(height, goal.y + radius + 1)):
+            for x in range(max(0, goal.x - radius),
+                           min(width, goal.x + radius + 1)):
+                idx = y * width + x
+                if passable[idx] and \
+                        math.sqrt((x - goal.x)**2 + (y - goal.y)**2) <= within:
+                    distance[idx] = 0
+                    fringe.append((0, idx))
+        heapq.heapify(fringe)
+
+        while fringe:
+            cost, idx = heappop(fringe)
+            if cost > distance[idx]:
+                continue
+            y, x = divmod(idx, width)
+            for dx, dy, step in NEIGHBOURS:
+                px, py = x + dx, y + dy
+                if px < 0 or py < 0 or px >= width or py >= height:
+                    continue
+                prev = py * width + px
+                if not passable[prev]:
+                    continue
+                prev_cost = cost + step
+                if prev_cost < distance[prev]:
+                    distance[prev] = prev_cost
+                    nxt[prev] = idx
+                    heappush(fringe, (prev_cost, prev))
+
+        self.distance = distance
+        self.next = nxt
+        self.goal = goal
+        self.within = within
+        self.map_version = self.world.map_version
+        self.builds += 1
+
+    def _index(self, pos):
+        if pos.x < 0 or pos.y < 0 or pos.x >= self.width or \
+                pos.y >= self.height:
+            return None
+        return pos.y * self.width + pos.x
+
+    def distance_to_goal(self, pos):
+        idx = self._index(pos)
+        return math.inf if idx is None else self.distance[idx]
+
+    def next_step(self, pos):
+        idx = self._index(pos)
+        if idx is None or self.next[idx] < 0:
+            return None
+        y, x = divmod(self.next[idx], self.width)
+        return Point(x, y)
@@ -19,7 +19,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   syntax='proto3',
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_pb=b'\n\ngame.proto\x12\x04game\"2\n\x10StartGameRequest\x12\x1e\n\nworld_size\x18\x01 \x01(\x0b\x32\n.game.Size\"B\n\x11StartGameResponse\x12\x0f\n\x07game_id\x18\x01 \x01(\x05\x12\x1c\n\tworld_map\x18\x02 \x01(\x0b\x32\t.game.Map\"R\n\x0fPlayGameRequest\x12\x0f\n\x07game_id\x18\x01 \x01(\x05\x12.\n\x13player_state_update\x18\x02 \x01(\x0b\x32\x11.game.PlayerState\"P\n\x10PlayGameResponse\x12\x11\n\tplayer_id\x18\x01 \x01(\x05\x12)\n\ngame_state\x18\x02 \x01(\x0b\x32\x15.game.GameStateUpdate\"S\n\x0fGameStateUpdate\x12\x1c\n\tworld_map\x18\x01 \x01(\x0b\x32\t.game.Map\x12\"\n\x07players\x18\x02 \x03(\x0b\x32\x11.game.PlayerState\"B\n\x0bPlayerState\x12\x11\n\tplayer_id\x18\x01 \x01(\x05\x12 \n\x08position\x18\x02 \x01(\x0b\x32\x0e.game.Position\"\x8b\x01\n\x08Position\x12\t\n\x01x\x18\x01 \x01(\x05\x12\t\n\x01y\x18\x02 \x01(\x05\x12(\n\x06\x66\x61\x63ing\x18\x03 \x01(\x0e\x32\x18.game.Position.Direction\"?\n\tDirection\x12\x0b\n\x07INVALID\x10\x00\x12\x06\n\x02UP\x10\x01\x12\x08\n\x04\x44OWN\x10\x02\x12\x08\n\x04LEFT\x10\x03\x12\t\n\x05RIGHT\x10\x04\"%\n\x04Size\x12\r\n\x05width\x18\x01 \x01(\x05\x12\x0e\n\x06height\x18\x02 \x01(\x05\"_\n\x03Map\x12\x1c\n\x08map_size\x18\x01 \x01(\x0b\x32\n.game.Size\x12\x1d\n\x05\x63\x65lls\x18\x02 \x03(\x0e\x32\x0e.game.Map.Cell\"\x1b\n\x04\x43\x65ll\x12\t\n\x05\x45mpty\x10\x00\x12\x08\n\x04Wall\x10\x01\x32\x7f\n\x04Game\x12<\n\tStartGame\x12\x16.game.StartGameRequest\x1a\x17.game.StartGameResponse\x12\x39\n\x08PlayGame\x12\x15.game.PlayGameRequest\x1a\x16.game.PlayGameResponseb\x06proto3'
+  serialized_pb=b'\n\ngame.proto\x12\x04game\"2\n\x10StartGameRequest\x12\x1e\n\nworld_size\x18\x01 \x01(\x0b\x32\n.game.Size\"B\n\x11StartGameResponse\x12\x0f\n\x07game_id\x18\x01 \x01(\x05\x12\x1c\n\tworld_map\x18\x02 \x01(\x0b\x32\t.game.Map\"\x9a\x01\n\x0fPlayGameRequest\x12\x0f\n\x07game_id\x18\x01 \x01(\x05\x12.\n\x13player_state_update\x18\x02 \x01(\x0b\x32\x11.game.PlayerState\x12.\n\x10\x61rea_of_interest\x18\x03 \x01(\x0b\x32\x14.game.AreaOfInterest\x12\x16\n\x0eknown_map_hash\x18\x04 \x01(\x0c\"P\n\x10PlayGameResponse\x12\x11\n\tplayer_id\x18\x01 \x01(\x05\x12)\n\ngame_state\x18\x02 \x01(\x0b\x32\x15.game.GameStateUpdate\"o\n\x14SubscribeGameRequest\x12\x0f\n\x07game_id\x18\x01 \x01(\x05\x12.\n\x10\x61rea_of_interest\x18\x02 \x01(\x0b\x32\x14.game.AreaOfInterest\x12\x16\n\x0eknown_map_hash\x18\x03 \x01(\x0c\"B\n\x0e\x41reaOfInterest\x12\x11\n\tplayer_id\x18\x01 \x01(\x05\x12\x1d\n\tview_size\x18\x02 \x01(\x0b\x32\n.game.Size\"\xb2\x01\n\x0fGameStateUpdate\x12\x1c\n\tworld_map\x18\x01 \x01(\x0b\x32\t.game.Map\x12\"\n\x07players\x18\x02 \x03(\x0b\x32\x11.game.PlayerState\x12\x0c\n\x04tick\x18\x03 \x01(\x05\x12\x1a\n\x12removed_player_ids\x18\x04 \x03(\x05\x12\x1a\n\x12\x65ntered_player_ids\x18\x05 \x03(\x05\x12\x17\n\x0fleft_player_ids\x18\x06 \x03(\x05\"Z\n\x0bPlayerState\x12\x11\n\tplayer_id\x18\x01 \x01(\x05\x12 \n\x08position\x18\x02 \x01(\x0b\x32\x0e.game.Position\x12\x16\n\x0einput_sequence\x18\x03 \x01(\r\"\x8b\x01\n\x08Position\x12\t\n\x01x\x18\x01 \x01(\x05\x12\t\n\x01y\x18\x02 \x01(\x05\x12(\n\x06\x66\x61\x63ing\x18\x03 \x01(\x0e\x32\x18.game.Position.Direction\"?\n\tDirection\x12\x0b\n\x07INVALID\x10\x00\x12\x06\n\x02UP\x10\x01\x12\x08\n\x04\x44OWN\x10\x02\x12\x08\n\x04LEFT\x10\x03\x12\t\n\x05RIGHT\x10\x04\"%\n\x04Size\x12\r\n\x05width\x18\x01 \x01(\x05\x12\x0e\n\x06height\x18\x02 \x01(\x05\"m\n\x03Map\x12\x1c\n\x08map_size\x18\x01 \x01(\x0b\x32\n.game.Size\x12\x1d\n\x05\x63\x65lls\x18\x02 \x03(\x0e\x32\x0e.game.Map.Cell\x12\x0c\n\x04hash\x18\x03 \x01(\x0c\"\x1b\n\x04\x43\x65ll\x12\t\n\x05\x45mpty\x10\x00\x12\x08\n\x04Wall\x10\x01\x32\xc5\x01\n\x04Game\x12<\n\tStartGame\x12\x16.game.StartGameRequest\x1a\x17.game.StartGameResponse\x12\x39\n\x08PlayGame\x12\x15.game.PlayGameRequest\x1a\x16.game.PlayGameResponse\x12\x44\n\rSubscribeGame\x12\x1a.game.SubscribeGameRequest\x1a\x15.game.GameStateUpdate0\x01\x62\x06proto3'
 )
 
 
@@ -59,8 +59,8 @@ _POSITION_DIRECTION = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   serialized_options=None,
-  serialized_start=536,
-  serialized_end=599,
+  serialized_start=910,
+  serialized_end=973,
 )
 _sym_db.RegisterEnumDescriptor(_POSITION_DIRECTION)
 
@@ -84,8 +84,8 @@ _MAP_CELL = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   serialized_options=None,
-  serialized_start=708,
-  serialized_end=735,
+  serialized_start=1096,
+  serialized_end=1123,
 )
 _sym_db.RegisterEnumDescriptor(_MAP_CELL)
 
@@ -183,6 +183,20 @@ _PLAYGAMEREQUEST = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='area_of_interest', full_name='game.PlayGameRequest.area_of_interest', index=2,
+      number=3, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='known_map_hash', full_name='game.PlayGameRequest.known_map_hash', index=3,
+      number=4, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -195,8 +209,8 @@ _PLAYGAMEREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=140,
-  serialized_end=222,
+  serialized_start=141,
+  serialized_end=295,
 )
 
 
@@ -234,8 +248,93 @@ _PLAYGAMERESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=224,
-  serialized_end=304,
+  serialized_start=297,
+  serialized_end=377,
+)
+
+
+_SUBSCRIBEGAMEREQUEST = _descriptor.Descriptor(
+  name='SubscribeGameRequest',
+  full_name='game.SubscribeGameRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='game_id', full_name='game.SubscribeGameRequest.game_id', index=0,
+      number=1, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='area_of_interest', full_name='game.SubscribeGameRequest.area_of_interest', index=1,
+      number=2, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='known_map_hash', full_name='game.SubscribeGameRequest.known_map_hash', index=2,
+      number=3, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=379,
+  serialized_end=490,
+)
+
+
+_AREAOFINTEREST = _descriptor.Descriptor(
+  name='AreaOfInterest',
+  full_name='game.AreaOfInterest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='player_id', full_name='game.AreaOfInterest.player_id', index=0,
+      number=1, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='view_size', full_name='game.AreaOfInterest.view_size', index=1,
+      number=2, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=492,
+  serialized_end=558,
 )
 
 
@@ -261,6 +360,34 @@ _GAMESTATEUPDATE = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='tick', full_name='game.GameStateUpdate.tick', index=2,
+      number=3, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='removed_player_ids', full_name='game.GameStateUpdate.removed_player_ids', index=3,
+      number=4, type=5, cpp_type=1, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='entered_player_ids', full_name='game.GameStateUpdate.entered_player_ids', index=4,
+      number=5, type=5, cpp_type=1, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='left_player_ids', full_name='game.GameStateUpdate.left_player_ids', index=5,
+      number=6, type=5, cpp_type=1, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -273,8 +400,8 @@ _GAMESTATEUPDATE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=306,
-  serialized_end=389,
+  serialized_start=561,
+  serialized_end=739,
 )
 
 
@@ -300,6 +427,13 @@ _PLAYERSTATE = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='input_sequence', full_name='game.PlayerState.input_sequence', index=2,
+      number=3, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -312,8 +446,8 @@ _PLAYERSTATE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=391,
-  serialized_end=457,
+  serialized_start=741,
+  serialized_end=831,
 )
 
 
@@ -359,8 +493,8 @@ _POSITION = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=460,
-  serialized_end=599,
+  serialized_start=834,
+  serialized_end=973,
 )
 
 
@@ -398,8 +532,8 @@ _SIZE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=601,
-  serialized_end=638,
+  serialized_start=975,
+  serialized_end=1012,
 )
 
 
@@ -425,6 +559,13 @@ _MAP = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='hash', full_name='game.Map.hash', index=2,
+      number=3, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -438,14 +579,17 @@ _MAP = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=640,
-  serialized_end=735,
+  serialized_start=1014,
+  serialized_end=1123,
 )
 
 _STARTGAMEREQUEST.fields_by_name['world_size'].message_type = _SIZE
 _STARTGAMERESPONSE.fields_by_name['world_map'].message_type = _MAP
 _PLAYGAMEREQUEST.fields_by_name['player_state_update'].message_type = _PLAYERSTATE
+_PLAYGAMEREQUEST.fields_by_name['area_of_interest'].message_type = _AREAOFINTEREST
 _PLAYGAMERESPONSE.fields_by_name['game_state'].message_type = _GAMESTATEUPDATE
+_SUBSCRIBEGAMEREQUEST.fields_by_name['area_of_interest'].message_type = _AREAOFINTEREST
+_AREAOFINTEREST.fields_by_name['view_size'].message_type = _SIZE
 _GAMESTATEUPDATE.fields_by_name['world_map'].message_type = _MAP
 _GAMESTATEUPDATE.fields_by_name['players'].message_type = _PLAYERSTATE
 _PLAYERSTATE.fields_by_name['position'].message_type = _POSITION
@@ -458,6 +602,8 @@ DESCRIPTOR.message_types_by_name['StartGameRequest'] = _STARTGAMEREQUEST
 DESCRIPTOR.message_types_by_name['StartGameResponse'] = _STARTGAMERESPONSE
 DESCRIPTOR.message_types_by_name['PlayGameRequest'] = _PLAYGAMEREQUEST
 DESCRIPTOR.message_types_by_name['PlayGameResponse'] = _PLAYGAMERESPONSE
+DESCRIPTOR.message_types_by_name['SubscribeGameRequest'] = _SUBSCRIBEGAMEREQUEST
+DESCRIPTOR.message_types_by_name['AreaOfInterest'] = _AREAOFINTEREST
 DESCRIPTOR.message_types_by_name['GameStateUpdate'] = _GAMESTATEUPDATE
 DESCRIPTOR.message_types_by_name['PlayerState'] = _PLAYERSTATE
 DESCRIPTOR.message_types_by_name['Position'] = _POSITION
@@ -493,6 +639,20 @@ PlayGameResponse = _reflection.GeneratedProtocolMessageType('PlayGameResponse',
   })
 _sym_db.RegisterMessage(PlayGameResponse)
 
+SubscribeGameRequest = _reflection.GeneratedProtocolMessageType('SubscribeGameRequest', (_message.Message,), {
+  'DESCRIPTOR' : _SUBSCRIBEGAMEREQUEST,
+  '__module__' : 'game_pb2'
+  # @@protoc_insertion_point(class_scope:game.SubscribeGameRequest)
+  })
+_sym_db.RegisterMessage(SubscribeGameRequest)
+
+AreaOfInterest = _reflection.GeneratedProtocolMessageType('AreaOfInterest', (_message.Message,), {
+  'DESCRIPTOR' : _AREAOFINTEREST,
+  '__module__' : 'game_pb2'
+  # @@protoc_insertion_point(class_scope:game.AreaOfInterest)
+  })
+_sym_db.RegisterMessage(AreaOfInterest)
+
 GameStateUpdate = _reflection.GeneratedProtocolMessageType('GameStateUpdate', (_message.Message,), {
   'DESCRIPTOR' : _GAMESTATEUPDATE,
   '__module__' : 'game_pb2'
@@ -537,8 +697,8 @@ _GAME = _descriptor.ServiceDescriptor(
   index=0,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=737,
-  serialized_end=864,
+  serialized_start=1126,
+  serialized_end=1323,
   methods=[
   _descriptor.MethodDescriptor(
     name='StartGame',
@@ -560,6 +720,16 @@ _GAME = _descriptor.ServiceDescriptor(
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='SubscribeGame',
+    full_name='game.Game.SubscribeGame',
+    index=2,
+    containing_service=None,
+    input_type=_SUBSCRIBEGAMEREQUEST,
+    output_type=_GAMESTATEUPDATE,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
 ])
 _sym_db.RegisterServiceDescriptor(_GAME)
 
@@ -24,6 +24,11 @@ class GameStub(object):
                 request_serializer=game__pb2.PlayGameRequest.SerializeToString,
                 response_deserializer=game__pb2.PlayGameResponse.FromString,
                 )
+        self.SubscribeGame = channel.unary_stream(
+                '/game.Game/SubscribeGame',
+                request_serializer=game__pb2.SubscribeGameRequest.SerializeToString,
+                response_deserializer=game__pb2.GameStateUpdate.FromString,
+                )
 
 
 class GameServicer(object):
@@ -41,6 +46,12 @@ class GameServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SubscribeGame(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_GameServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -54,6 +65,11 @@ def add_GameServicer_to_server(servicer, server):
                     request_deserializer=game__pb2.PlayGameRequest.FromString,
                     response_serializer=game__pb2.PlayGameResponse.SerializeToString,
             ),
+            'SubscribeGame': grpc.unary_stream_rpc_method_handler(
+                    servicer.SubscribeGame,
+                    request_deserializer=game__pb2.SubscribeGameRequest.FromString,
+                    response_serializer=game__pb2.GameStateUpdate.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'game.Game', rpc_method_handlers)
@@ -95,3 +111,19 @@ class Game(object):
             game__pb2.PlayGameResponse.FromString,
             options, channel_credentials,
             call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def SubscribeGame(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/game.Game/SubscribeGame',
+            game__pb2.SubscribeGameRequest.SerializeToString,
+            game__pb2.GameStateUpdate.FromString,
+            options, channel_credentials,
+            call_credentials, compression, wait_for_ready, timeout, metadata)
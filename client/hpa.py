@@ -0,0 +1,295 @@
+import heapq
+import math
+
+from astar import find_path_jps, octile, passable_mask, SQRT2
+from geometry import Point
+
+
+CLUSTER_SIZE = 10
+
+# Entrances narrower than this get a single transition in their middle,
+# wider ones get a transition at each end.
+MAX_SINGLE_TRANSITION_WIDTH = 6
+
+NEIGHBOURS = [(dx, dy, SQRT2 if dx and dy else 1.0)
+              for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+# Kinds of edge in the abstract graph.
+SRC_EDGE = 0
+DST_EDGE = 1
+INTRA_EDGE = 2
+INTER_EDGE = 3
+
+
+# Hierarchical path-finding (HPA*) over a World for one passability class.
+# The grid is split into square clusters, connected through transitions on
+# the borders between them. Distances between the transitions of a cluster
+# are precomputed, so long-range queries only search the abstract graph of
+# transitions, and only the cluster segments a path uses are refined into
+# cells. Tile changes rebuild the affected clusters on the next query.
+class PathHierarchy:
+    def __init__(self, world, impassable, cluster_size=CLUSTER_SIZE):
+        self.world = world
+        self.impassable = impassable
+        self.cluster_size = cluster_size
+        self.width = world.WIDTH_TILES
+        self.height = world.HEIGHT_TILES
+        self.clusters_x = math.ceil(self.width / cluster_size)
+        self.clusters_y = math.ceil(self.height / cluster_size)
+        self._passable = None
+
+        # (cluster, cluster) -> [(node, node)] transitions across a border.
+        self.borders = {}
+        # node -> {node: cost} edges across borders.
+        self.inter = {}
+        # cluster -> {node: {node: cost}} edges within clusters.
+        self.intra = {}
+        # cluster -> {(node, node): [cell]} refined intra-cluster edges.
+        self.segments = {}
+
+        self.dirty = {(cx, cy) for cx in range(self.clusters_x)
+                      for cy in range(self.clusters_y)}
+        self.clusters_rebuilt = 0
+
+    def cluster_of(self, x, y):
+        return x // self.cluster_size, y // self.cluster_size
+
+    def _cluster_bounds(self, cluster):
+        cx, cy = cluster
+        x0, y0 = cx * self.cluster_size, cy * self.cluster_size
+        return (x0, y0, min(self.width, x0 + self.cluster_size),
+                min(self.height, y0 + self.cluster_size))
+
+    def free(self, x, y):
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return False
+        return self._passable[y * self.width + x]
+
+    def invalidate(self, pos):
+        if 0 <= pos.x < self.width and 0 <= pos.y < self.height:
+            self.dirty.add(self.cluster_of(pos.x, pos.y))
+
+    def _border_keys(self, cluster):
+        cx, cy = cluster
+        keys = []
+        if cx > 0:
+            keys.append(((cx - 1, cy), cluster))
+        if cx < self.clusters_x - 1:
+            keys.append((cluster, (cx + 1, cy)))
+        if cy > 0:
+            keys.append(((cx, cy - 1), cluster))
+        if cy < self.clusters_y - 1:
+            keys.append((cluster, (cx, cy + 1)))
+        return keys
+
+    def _compute_border(self, cluster1, cluster2):
+        x0, y0, x1, y1 = self._cluster_bounds(cluster1)
+        if cluster1[0] != cluster2[0]:
+            pairs = [((x1 - 1, y), (x1, y)) for y in range(y0, y1)]
+        else:
+            pairs = [((x, y1 - 1), (x, y1)) for x in range(x0, x1)]
+
+        transitions = []
+        entrance = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and self.free(*a) and self.free(*b):
+                entrance.append((a, b))
+                continue
+            if not entrance:
+                continue
+            if len(entrance) < MAX_SINGLE_TRANSITION_WIDTH:
+                transitions.append(entrance[len(entrance) // 2])
+            else:
+                transitions.extend([entrance[0], entrance[-1]])
+            entrance = []
+        return transitions
+
+    def _set_border(self, key, transitions):
+        for a, b in self.borders.get(key, []):
+            del self.inter[a][b]
+            del self.inter[b][a]
+        self.borders[key] = transitions
+        for a, b in transitions:
+            self.inter.setdefault(a, {})[b] = 1.0
+            self.inter.setdefault(b, {})[a] = 1.0
+
+    def _cluster_nodes(self, cluster):
+        nodes = set()
+        for key in self._border_keys(cluster):
+            for a, b in self.borders.get(key, []):
+                nodes.add(a if self.cluster_of(*a) == cluster else b)
+        return nodes
+
+    def _open_cells(self, cluster):
+        x0, y0, x1, y1 = self._cluster_bounds(cluster)
+        return {(x, y) for x in range(x0, x1) for y in range(y0, y1)
+                if self.free(x, y)}
+
+    # Dijkstra from start, confined to the open cells of a cluster.
+    def _cluster_search(self, cluster, start, open_cells=None):
+        if open_cells is None:
+            open_cells = self._open_cells(cluster)
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        dist = {start: 0}
+        parent = {}
+        fringe = [(0, start)]
+        while fringe:
+            cost, cell = heappop(fringe)
+            if cost > dist[cell]:
+                continue
+            x, y = cell
+            for dx, dy, step in NEIGHBOURS:
+                succ = (x + dx, y + dy)
+                if succ not in open_cells:
+                    continue
+                succ_cost = cost + step
+                if succ_cost < dist.get(succ, math.inf):
+                    dist[succ] = succ_cost
+                    parent[succ] = cell
+                    heappush(fringe, (succ_cost, succ))
+        return dist, parent
+
+    def _rebuild_cluster(self, cluster):
+        nodes = self._cluster_nodes(cluster)
+        open_cells = self._open_cells(cluster)
+        edges = {node: {} for node in nodes}
+        for node in nodes:
+            dist, _parent = self._cluster_search(cluster, node, open_cells)
+            for other in nodes:
+                if other != node and other in dist:
+                    edges[node][other] = dist[other]
+        self.intra[cluster] = edges
+        self.segments[cluster] = {}
+        self.clusters_rebuilt += 1
+
+    def update(self):
+        if not self.dirty:
+            return
+        dirty, self.dirty = self.dirty, set()
+        self._passable = passable_mask(self.world, self.impassable).tobytes()
+
+        # Clusters across a border whose transitions moved have new nodes,
+        # so they need their edges rebuilt too.
+        rebuild = set(dirty)
+        done = set()
+        for cluster in dirty:
+            for key in self._border_keys(cluster):
+                if key in done:
+                    continue
+                done.add(key)
+                transitions = self._compute_border(*key)
+                if transitions != self.borders.get(key):
+                    self._set_border(key, transitions)
+                    rebuild.update(key)
+
+        for cluster in rebuild:
+            self._rebuild_cluster(cluster)
+
+    def _segment(self, cluster, a, b):
+        segments = self.segments[cluster]
+        path = segments.get((a, b))
+        if path is None:
+            _dist, parent = self._cluster_search(cluster, a)
+            path = _walk(parent, b)
+            segments[(a, b)] = path
+        return path
+
+    def find_path(self, src, dst, within=0, stats=None):
+        self.update()
+
+        src_node, dst_node = (src.x, src.y), (dst.x, dst.y)
+        src_cluster = self.cluster_of(*src_node)
+        dst_cluster = self.cluster_of(*dst_node)
+        # Short queries, and goals that cannot be stood on, are answered
+        # by a flat search.
+        if src_cluster == dst_cluster or not self.free(*dst_node):
+            return find_path_jps(self.world, src, dst, self.impassable,
+                                 within, stats)
+
+        src_dist, src_parent = self._cluster_search(src_cluster, src_node)
+        dst_dist, dst_parent = self._cluster_search(dst_cluster, dst_node)
+        src_links = {node: src_dist[node] for node in self.intra[src_cluster]
+                     if node in src_dist}
+        dst_links = {node: dst_dist[node] for node in self.intra[dst_cluster]
+                     if node in dst_dist}
+
+        def edges(node):
+            if node == src_node:
+                for succ, cost in src_links.items():
+                    yield succ, cost, SRC_EDGE
+            else:
+                cluster = self.cluster_of(*node)
+                for succ, cost in self.intra[cluster][node].items():
+                    yield succ, cost, INTRA_EDGE
+            for succ, cost in self.inter.get(node, {}).items():
+                yield succ, cost, INTER_EDGE
+            if node in dst_links:
+                yield dst_node, dst_links[node], DST_EDGE
+
+        cost = {src_node: 0}
+        came_from = {}
+        closed = set()
+        fringe = [(0, src_node)]
+        expanded = 0
+        while fringe:
+            _priority, node = heapq.heappop(fringe)
+            if node in closed:
+                continue
+            closed.add(node)
+            if node == dst_node:
+                break
+            expanded += 1
+            for succ, edge_cost, kind in edges(node):
+                if succ in closed:
+                    continue
+                succ_cost = cost[node] + edge_cost
+                if succ_cost < cost.get(succ, math.inf):
+                    cost[succ] = succ_cost
+                    came_from[succ] = (node, kind)
+                    hcost = octile(succ[0] - dst.x, succ[1] - dst.y)
+                    heapq.heappush(fringe, (succ_cost + hcost, succ))
+
+        if stats is not None:
+            stats['expanded'] = expanded
+        if dst_node not in closed:
+            # The abstract graph misses diagonal moves across cluster
+            # corners, so make sure there really is no path.
+            return find_path_jps(self.world, src, dst, self.impassable,
+                                 within, stats)
+
+        abstract_path = [(dst_node, None)]
+        while abstract_path[-1][0] != src_node:
+            abstract_path.append(came_from[abstract_path[-1][0]])
+        abstract_path.reverse()
+
+        cells = [src_node]
+        for (node, kind), (succ, _kind) in zip(abstract_path,
+                                               abstract_path[1:]):
+            if kind == SRC_EDGE:
+                cells.extend(_walk(src_parent, succ))
+            elif kind == DST_EDGE:
+                cells.extend(reversed(_walk(dst_parent, node)[:-1]))
+                cells.append(dst_node)
+            elif kind == INTRA_EDGE:
+                cells.extend(self._segment(self.cluster_of(*node), node,
+                                           succ))
+            else:
+                cells.append(succ)
+
+        path = []
+        for x, y in cells:
+            path.append(Point(x, y))
+            if math.sqrt((x - dst.x)**2 + (y - dst.y)**2) <= within:
+                break
+        return path
+
+
+# Cells from just after the search start up to and including cell.
+def _walk(parent, cell):
+    cells = []
+    while cell in parent:
+        cells.append(cell)
+        cell = parent[cell]
+    cells.reverse()
+    return cells
@@ -0,0 +1,108 @@
+from collections import deque
+
+
+# Remote players are drawn this far in the past, so that there is usually a
+# snapshot on either side of the time being drawn.
+INTERPOLATION_DELAY_MS = 100
+# When snapshots stop coming, positions are extrapolated for at most this
+# long, and then brought back to the last snapshot.
+MAX_EXTRAPOLATION_MS = 250
+MAX_SNAPSHOTS = 32
+
+
+# Timestamped (time, x, y, facing) snapshots of one entity.
+class SnapshotBuffer:
+    def __init__(self, capacity=MAX_SNAPSHOTS):
+        self.snapshots = deque(maxlen=capacity)
+
+    def add(self, time, x, y, facing):
+        if self.snapshots and time < self.snapshots[-1][0]:
+            return
+        self.snapshots.append((time, x, y, facing))
+
+    def latest(self):
+        return self.snapshots[-1]
+
+    def sample(self, time, max_extrapolation=MAX_EXTRAPOLATION_MS):
+        snapshots = self.snapshots
+        if time <= snapshots[0][0]:
+            _time, x, y, facing = snapshots[0]
+            return x, y, facing
+
+        for i in range(len(snapshots) - 1, 0, -1):
+            t0, x0, y0, facing0 = snapshots[i - 1]
+            t1, x1, y1, facing1 = snapshots[i]
+            if t0 <= time <= t1:
+                a = (time - t0) / (t1 - t0) if t1 > t0 else 1
+                facing = facing0 if a < 0.5 else facing1
+                return x0 + (x1 - x0) * a, y0 + (y1 - y0) * a, facing
+            if time > t1:
+                break
+
+        # Past the newest snapshot, keep going at the last known velocity
+        # for a while. No update comes when no player moved, so silence more
+        # often means the entity stopped than that updates were lost: after
+        # max_extrapolation, it eases back to the last snapshot over as long
+        # again.
+        t1, x1, y1, facing = snapshots[-1]
+        if len(snapshots) < 2:
+            return x1, y1, facing
+        t0, x0, y0, _facing = snapshots[-2]
+        dt = time - t1
+        if dt > max_extrapolation:
+            dt = 2 * max_extrapolation - dt
+        if t1 <= t0 or dt <= 0:
+            return x1, y1, facing
+        a = dt / (t1 - t0)
+        return x1 + (x1 - x0) * a, y1 + (y1 - y0) * a, facing
+
+
+# Snapshot buffers for every remote player in a game, fed from
+# GameStateUpdates and sampled at a delay when rendering.
+class RemotePlayers:
+    def __init__(self, delay=INTERPOLATION_DELAY_MS,
+                 max_extrapolation=MAX_EXTRAPOLATION_MS):
+        self.delay = delay
+        self.max_extrapolation = max_extrapolation
+        self.buffers = {}
+
+    def clear(self):
+        self.buffers.clear()
+
+    # Adds the players of an update received at the given time, in ms,
+    # leaving out the local player.
+    def apply(self, update, time, local_player_id=None):
+        if update.HasField('world_map'):
+            self.buffers.clear()
+        # Players coming back into view start over rather than sliding
+        # across from where they were last seen.
+        for player_ids in [update.removed_player_ids, update.left_player_ids,
+                           update.entered_player_ids]:
+            for player_id in player_ids:
+                self.buffers.pop(player_id, None)
+
+        updated = set()
+        for player in update.players:
+            if player.player_id == local_player_id:
+                continue
+            buffer = self.buffers.get(player.player_id)
+            if buffer is None:
+                buffer = SnapshotBuffer()
+                self.buffers[player.player_id] = buffer
+            position = player.position
+            buffer.add(time, position.x, position.y, position.facing)
+            updated.add(player.player_id)
+
+        # Updates only carry the players that changed, so the others were
+        # standing still.
+        for player_id, buffer in self.buffers.items():
+            if player_id not in updated:
+                _time, x, y, facing = buffer.latest()
+                buffer.add(time, x, y, facing)
+
+    # {player_id: (x, y, facing)} of the remote players as they are drawn at
+    # the given time, with fractional tile coordinates.
+    def positions(self, time):
+        render_time = time - self.delay
+        return {player_id: buffer.sample(render_time, self.max_extrapolation)
+                for player_id, buffer in self.buffers.items()}
@@ -0,0 +1,321 @@
+import argparse
+import asyncio
+import hashlib
+import random
+
+import grpc
+
+import game_pb2
+import game_pb2_grpc
+from mapgen import generate_cells, random_empty_cell, MAP_HEIGHT_MAX, \
+    MAP_HEIGHT_MIN, MAP_WIDTH_MAX, MAP_WIDTH_MIN
+
+
+# A grpc.aio stand-in for the Rust game server in server/src/server.rs, for
+# running, scripting and load testing the client without building it.
+#
+# Everything runs on one event loop, so games need no locks. Each game
+# serializes its map once, and responses are sent as bytes with that
+# encoding appended: protobuf parsers merge repeated occurrences of an
+# embedded message, so the map does not have to be encoded again.
+
+TICK_INTERVAL = 0.1
+
+# Players this many tiles outside an area of interest are still sent, so
+# that they are known about before they come into view.
+INTEREST_MARGIN = 4
+
+# Updates queued for a subscriber that is not reading them. Past this the
+# subscription is ended, and the client has to subscribe again.
+MAX_QUEUED_UPDATES = 64
+
+# Clients may ping connections without calls on them this often. gRPC's
+# default is 5 minutes, with more frequent pings ending the connection as
+# abuse. The Rust server's tonic (hyper) answers pings without policing
+# them, so it needs no such setting.
+MIN_PING_INTERVAL_MS = 10000
+
+
+# Whether a position is in the area of interest around center, margin
+# included.
+def in_area(position, center, area, margin=INTEREST_MARGIN):
+    left = center.x - area.view_size.width // 2 - margin
+    top = center.y - area.view_size.height // 2 - margin
+    return left <= position.x < left + area.view_size.width + 2 * margin \
+        and top <= position.y < top + area.view_size.height + 2 * margin
+
+
+class Subscriber:
+    def __init__(self, area):
+        self.area = area
+        # Ids of the players in the area of interest as last sent.
+        self.visible = set()
+        self.queue = asyncio.Queue(MAX_QUEUED_UPDATES)
+
+    def send(self, update):
+        if self.queue.full():
+            # Make room for the message that ends the subscription.
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+        self.queue.put_nowait(update)
+        return True
+
+
+class LocalGame:
+    def __init__(self, game_id, world_size, rng):
+        self.id = game_id
+        cells = generate_cells(world_size.width, world_size.height, rng)
+        world_map = game_pb2.Map(map_size=world_size, cells=cells)
+        world_map.hash = hashlib.blake2b(world_map.SerializeToString(),
+                                         digest_size=8).digest()
+        self.map_hash = world_map.hash
+        self.start_response = game_pb2.StartGameResponse(
+            game_id=game_id, world_map=world_map).SerializeToString()
+        self.map_update = game_pb2.GameStateUpdate(
+            world_map=world_map).SerializeToString()
+        self.play_map_response = game_pb2.PlayGameResponse(
+            game_state=game_pb2.GameStateUpdate(
+                world_map=world_map)).SerializeToString()
+        # For callers that have the map already.
+        hash_update = game_pb2.GameStateUpdate(
+            world_map=game_pb2.Map(hash=self.map_hash))
+        self.hash_update = hash_update.SerializeToString()
+        self.play_hash_response = game_pb2.PlayGameResponse(
+            game_state=hash_update).SerializeToString()
+
+        x, y = random_empty_cell(cells, world_size.width, world_size.height,
+                                 rng)
+        position = game_pb2.Position(x=x, y=y,
+                                     facing=game_pb2.Position.DOWN)
+        self.players = {0: game_pb2.PlayerState(player_id=0,
+                                                position=position)}
+        # Ids of the players updated since the last tick.
+        self.changed = set()
+        self.tick = 0
+        self.subscribers = set()
+        # Ids of the players last sent by PlayGame, for each area of
+        # interest.
+        self.play_views = {}
+
+    def update_player(self, player_state):
+        player = self.players.get(player_state.player_id)
+        # Updates that arrive out of order are stale.
+        if player is not None and \
+                player_state.input_sequence < player.input_sequence:
+            return
+        self.players[player_state.player_id] = player_state
+        self.changed.add(player_state.player_id)
+
+    # The players in the area of interest, or all of them without one.
+    def visible_players(self, area=None):
+        center = self.players.get(area.player_id) \
+            if area is not None else None
+        if center is None:
+            return list(self.players.values())
+        return [player for player in self.players.values()
+                if in_area(player.position, center.position, area)]
+
+    # Ids of the players that came into and went out of the view of a
+    # PlayGame caller since its previous call.
+    def update_play_view(self, area, players):
+        visible = {player.player_id for player in players}
+        previous = self.play_views.get(area.player_id, set())
+        self.play_views[area.player_id] = visible
+        return sorted(visible - previous), sorted(previous - visible)
+
+    # Registers a subscriber, returning it along with the first update of
+    # its stream, which only has the map's hash if it is known_map_hash.
+    def subscribe(self, area, known_map_hash=b''):
+        subscriber = Subscriber(area)
+        players = self.visible_players(area)
+        subscriber.visible = {player.player_id for player in players}
+        update = game_pb2.GameStateUpdate(players=players, tick=self.tick)
+        if area is not None:
+            update.entered_player_ids.extend(sorted(subscriber.visible))
+        self.subscribers.add(subscriber)
+        if known_map_hash == self.map_hash:
+            return subscriber, self.hash_update + update.SerializeToString()
+        return subscriber, self.map_update + update.SerializeToString()
+
+    # Advances the game by one tick and queues the players that changed
+    # during it for every subscriber.
+    def step(self):
+        self.tick += 1
+        changed, self.changed = self.changed, set()
+
+        broadcast = None
+        for subscriber in list(self.subscribers):
+            if subscriber.area is None:
+                if not changed:
+                    continue
+                # Encoded once for all the subscribers that see everything.
+                if broadcast is None:
+                    broadcast = game_pb2.GameStateUpdate(
+                        players=[self.players[player_id]
+                                 for player_id in sorted(changed)],
+                        tick=self.tick).SerializeToString()
+                update = broadcast
+            else:
+                visible = {player.player_id for player
+                           in self.visible_players(subscriber.area)}
+                entered = visible - subscriber.visible
+                left = subscriber.visible - visible
+                subscriber.visible = visible
+                players = [self.players[player_id]
+                           for player_id in sorted(visible)
+                           if player_id in changed or player_id in entered]
+                if not players and not left:
+                    continue
+                update = game_pb2.GameStateUpdate(
+                    players=players, tick=self.tick,
+                    entered_player_ids=sorted(entered),
+                    left_player_ids=sorted(left)).SerializeToString()
+            if not subscriber.send(update):
+                self.subscribers.discard(subscriber)
+
+
+# The methods of this servicer return serialized messages, so it has to be
+# registered with add_to_server rather than with game_pb2_grpc's helper.
+class LocalGameServicer(game_pb2_grpc.GameServicer):
+    def __init__(self, tick_interval=TICK_INTERVAL, seed=None):
+        self.tick_interval = tick_interval
+        self.rng = random.Random(seed)
+        self.games = {}
+
+    async def _game(self, game_id, context):
+        game = self.games.get(game_id)
+        if game is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "No such game")
+        return game
+
+    # Steps every game at a fixed rate, however long the steps take.
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += self.tick_interval
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+            for game in list(self.games.values()):
+                game.step()
+
+    async def StartGame(self, request, context):
+        if not request.HasField('world_size'):
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT,
+                                "No world size specified")
+        world_size = request.world_size
+        if world_size.width < MAP_WIDTH_MIN \
+                or world_size.width > MAP_WIDTH_MAX \
+                or world_size.height > MAP_HEIGHT_MAX \
+                or world_size.height < MAP_HEIGHT_MIN:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT,
+                                "Bad world size")
+
+        game = LocalGame(len(self.games), world_size, self.rng)
+        self.games[game.id] = game
+        print(f"Created game id: {game.id}")
+
+        return game.start_response
+
+    async def PlayGame(self, request, context):
+        game = await self._game(request.game_id, context)
+        if request.HasField('player_state_update'):
+            game.update_player(request.player_state_update)
+
+        area = request.area_of_interest \
+            if request.HasField('area_of_interest') else None
+        players = game.visible_players(area)
+        game_state = game_pb2.GameStateUpdate(players=players, tick=game.tick)
+        if area is not None:
+            entered, left = game.update_play_view(area, players)
+            game_state.entered_player_ids.extend(entered)
+            game_state.left_player_ids.extend(left)
+        response = game_pb2.PlayGameResponse(player_id=0,
+                                             game_state=game_state)
+        if request.known_map_hash == game.map_hash:
+            return game.play_hash_response + response.SerializeToString()
+        return game.play_map_response + response.SerializeToString()
+
+    async def SubscribeGame(self, request, context):
+        game = await self._game(request.game_id, context)
+        area = request.area_of_interest \
+            if request.HasField('area_of_interest') else None
+
+        subscriber, update = game.subscribe(area, request.known_map_hash)
+        try:
+            yield update
+            while True:
+                update = await subscriber.queue.get()
+                if update is None:
+                    await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,
+                                        "Too many updates left unread")
+                yield update
+        finally:
+            game.subscribers.discard(subscriber)
+
+
+def _serialized(response):
+    return response
+
+
+def add_to_server(servicer, server):
+    handlers = {
+        'StartGame': grpc.unary_unary_rpc_method_handler(
+            servicer.StartGame,
+            request_deserializer=game_pb2.StartGameRequest.FromString,
+            response_serializer=_serialized),
+        'PlayGame': grpc.unary_unary_rpc_method_handler(
+            servicer.PlayGame,
+            request_deserializer=game_pb2.PlayGameRequest.FromString,
+            response_serializer=_serialized),
+        'SubscribeGame': grpc.unary_stream_rpc_method_handler(
+            servicer.SubscribeGame,
+            request_deserializer=game_pb2.SubscribeGameRequest.FromString,
+            response_serializer=_serialized),
+    }
+    server.add_generic_rpc_handlers(
+        (grpc.method_handlers_generic_handler('game.Game', handlers),))
+
+
+# Starts a server on the running event loop. The servicer's games tick
+# until the server stops.
+async def serve(address, servicer):
+    server = grpc.aio.server(options=[
+        ('grpc.keepalive_permit_without_calls', 1),
+        ('grpc.http2.min_recv_ping_interval_without_data_ms',
+         MIN_PING_INTERVAL_MS),
+        ('grpc.http2.max_ping_strikes', 0),
+    ])
+    add_to_server(servicer, server)
+    server.add_insecure_port(address)
+    await server.start()
+    asyncio.ensure_future(_tick_until_stopped(server, servicer))
+    return server
+
+
+async def _tick_until_stopped(server, servicer):
+    ticker = asyncio.ensure_future(servicer.run())
+    await server.wait_for_termination()
+    ticker.cancel()
+
+
+async def _main(args):
+    server = await serve(args.address,
+                         LocalGameServicer(args.tick_interval, args.seed))
+    print(f"Listening on {args.address}")
+    await server.wait_for_termination()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a local stand-in for the game server.")
+    parser.add_argument('--address', default='[::]:50051')
+    parser.add_argument('--tick-interval', type=float, default=TICK_INTERVAL)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    asyncio.run(_main(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,39 @@
-import enum
+import argparse
+import functools
 import io
+import math
 import os
 import random
 import sys
 import time
 
+# Before the other imports, so that the startup report includes them.
+import startup
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
 import pygame as pg
 
 from abc import abstractmethod
-from geometry import Direction, pdist, Point, Rotation
-
-from map import get_map
-from world import World
+from geometry import Direction, pdist, Rotation
+
+from atlas import ASSET_CACHE_DIR, load_atlas
+from simulation import FixedTimestep, GameState, GameTime, \
+    MAX_CATCH_UP_STEPS, Simulation, SIMULATION_RATE
+from startup import lazy_import
+from world import TREE
+
+# The network stack takes longer to import than the rest of the game, so
+# it is left until after the loading screen is up.
+if TYPE_CHECKING:
+    import connection
+    import game_pb2
+    import network
+else:
+    connection = lazy_import('connection')
+    game_pb2 = lazy_import('game_pb2')
+    network = lazy_import('network')
 
 
 # Logical screen dimensions. This will be scaled to fit the display window.
@@ -23,6 +45,26 @@ TILE_HEIGHT = 32
 SCREEN_WIDTH_TILES = int(SCREENRECT.width / TILE_WIDTH)
 SCREEN_HEIGHT_TILES = int(SCREENRECT.height / TILE_HEIGHT)
 WHITE_COLOR = (255, 255, 255)
+TITLE_FONT_SIZE = 48
+# Frames drawn a second at most, or 0 for as many as possible.
+FRAME_RATE = 60
+
+# The map is pre-rendered in square chunks of CHUNK_TILES x CHUNK_TILES tiles,
+# at the window's tile size. Chunks are kept around up to
+# MAX_CHUNK_CACHE_BYTES of surfaces, 64 chunks at TILE_WIDTH, but never fewer
+# than MIN_CACHED_CHUNKS, the most a view can overlap.
+CHUNK_TILES = 8
+MAX_CHUNK_CACHE_BYTES = 64 * (CHUNK_TILES * TILE_WIDTH) * \
+    (CHUNK_TILES * TILE_HEIGHT) * 4
+MIN_CACHED_CHUNKS = (math.ceil(SCREEN_WIDTH_TILES / CHUNK_TILES) + 1) * \
+    (math.ceil(SCREEN_HEIGHT_TILES / CHUNK_TILES) + 1)
+
+# Game.last_frame while the loading screen is shown.
+LOADING_FRAME = 'loading'
+
+# Events after which the window has to be drawn again in full, as some of
+# it was covered or lost. WINDOWEXPOSED is new in pygame 2.
+EXPOSE_EVENTS = {pg.VIDEOEXPOSE, getattr(pg, 'WINDOWEXPOSED', pg.VIDEOEXPOSE)}
 
 ASSETS = [
     {'name': "water",  'tiles': True},
@@ -40,20 +82,17 @@ def resource_dir():
     return os.path.join(base_path, 'assets')
 
 
-class GameState(enum.Enum):
-    STARTED = 1
-
-
-class GameTime:
-    current_time = 0
+# Fonts are loaded when first drawn with.
+@functools.lru_cache(maxsize=None)
+def load_font(size):
+    return pg.font.Font(os.path.join(resource_dir(), "freesansbold.ttf"),
+                        size)
 
-    @classmethod
-    def current_time_ms(cls):
-        return cls.current_time
 
-    @classmethod
-    def update(cls, time_delta_ms):
-        cls.current_time += time_delta_ms
+def draw_loading(surface, rect):
+    surface.fill((0, 0, 0), rect)
+    text = load_font(TITLE_FONT_SIZE).render("Loading...", True, WHITE_COLOR)
+    surface.blit(text, text.get_rect(center=rect.center))
 
 
 class Controller:
@@ -62,7 +101,7 @@ class Controller:
         pass
 
     @abstractmethod
-    def tick(self, game, clock):
+    def tick(self, game, time_delta_ms):
         pass
 
 
@@ -90,8 +129,8 @@ class GameController(Controller):
                 return True
 
 
-    def tick(self, game, clock):
-        GameTime.update(clock.get_time())
+    def tick(self, game, time_delta_ms):
+        GameTime.update(time_delta_ms)
         current_timestamp = GameTime.current_time_ms()
 
         if current_timestamp > self.last_move_timestamp + \
@@ -111,247 +150,364 @@ class GameController(Controller):
                 game.move(Direction.RIGHT)
                 self.last_move_timestamp = current_timestamp
 
-        for scheduled_event in game.scheduled_events:
-            if current_timestamp > scheduled_event.last_timestamp + \
-                                    scheduled_event.period:
-                scheduled_event.action(scheduled_event, current_timestamp)
-                scheduled_event.last_timestamp = current_timestamp
-
+        game.run_scheduled_events(current_timestamp)
         game.tick()
 
 
-class Game:
-    N_GROUND_TILES = 30
+class LoadingController(Controller):
+    def handle(self, event, game):
+        if event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE:
+            return True
+
+    def tick(self, game, time_delta_ms):
+        GameTime.update(time_delta_ms)
+
+
+# Rendered chunks, the least recently used dropped first once they take
+# more than max_bytes.
+class ChunkCache:
+    def __init__(self, render_chunk, max_bytes=MAX_CHUNK_CACHE_BYTES,
+                 min_chunks=MIN_CACHED_CHUNKS):
+        self.render_chunk = render_chunk
+        self.max_bytes = max_bytes
+        self.min_chunks = min_chunks
+        self.chunks = OrderedDict()
+        self.bytes = 0
+
+    def get(self, cx, cy):
+        key = (cx, cy)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.render_chunk(cx, cy)
+            self.chunks[key] = chunk
+            self.bytes += chunk.get_pitch() * chunk.get_height()
+            while self.bytes > self.max_bytes and \
+                    len(self.chunks) > self.min_chunks:
+                _key, old = self.chunks.popitem(last=False)
+                self.bytes -= old.get_pitch() * old.get_height()
+        else:
+            self.chunks.move_to_end(key)
+        return chunk
 
-    def __init__(self, screen, game_id=None):
-        font_path = os.path.join(resource_dir(), "freesansbold.ttf")
-        self.title_font = pg.font.Font(font_path, 48)
-        self.stats_font = pg.font.Font(font_path, 28)
-        self.score_font = pg.font.Font(font_path, 24)
+    def clear(self):
+        self.chunks.clear()
+        self.bytes = 0
 
-        self.screen = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+class Game(Simulation):
+    def __init__(self, screen, game_id=None, network=None, map=None):
         self.display_screen = screen
-        self.assets = {}
+        self.atlas = None
+        self.chunk_cache = ChunkCache(self._render_chunk)
+
+        # The game is drawn straight into the window, with the atlas and
+        # map chunks scaled to the window's tile size. These are worked out
+        # again by _present_at whenever the window size changes.
+        self.scaled_atlas = None
+        self.tile_width = TILE_WIDTH
+        self.tile_height = TILE_HEIGHT
+        self.view_rect = SCREENRECT.copy()
+        self.display_size = None
+        # What the last frame drew, as (origin, map version, sprites), and
+        # whether the whole window has to be updated with the next one.
+        self.last_frame = None
+        self.full_update = True
 
         self.controllers = {
             GameState.STARTED: GameController(),
+            GameState.LOADING: LoadingController(),
         }
 
-        self.game_id = game_id
-        self.reset()
-
-    def reset(self):
-        self.scheduled_events = []
-
-        m, self.game_id = get_map(self.game_id)
-        self.world = World(m, self.N_GROUND_TILES)
-        self.new_pos = Point(self.world.player.pos.x,
-                             self.world.player.pos.y)
-
-        self.state = GameState.STARTED
-
-    def _schedule_event(self, action, period):
-        event = ScheduledEvent(action, period)
-        self.scheduled_events.append(event)
-
-    def load_assets(self):
-        assets_path = resource_dir()
-        for asset in ASSETS:
-            asset_filename = asset if isinstance(asset, str) else asset['name']
-            f = os.path.join(assets_path, f"{asset_filename}.png")
-            try:
-                surface = pg.image.load(f)
-            except pg.error:
-                raise SystemExit((f"Failed to load asset {asset_filename}: "
-                                  f"{pg.get_error()}"))
-            surface = surface.convert_alpha()
-            if surface.get_width() > TILE_WIDTH and isinstance(asset, dict) \
-                    and asset.get('tiles'):
-                self.assets[asset_filename] = []
-                for i in range(int(surface.get_width() / TILE_WIDTH)):
-                    r = pg.rect.Rect(i*TILE_WIDTH, 0, TILE_WIDTH, TILE_HEIGHT)
-                    subsurface = surface.subsurface(r)
-                    self.assets[asset_filename].append(subsurface)
-                    if isinstance(asset, dict) and asset.get('mirror'):
-                        self.assets[asset_filename].append(pg.transform.flip(
-                            subsurface, True, False))
-            else:
-                self.assets[asset_filename] = surface.convert_alpha()
-
-    def _draw_image_at(self, image, x, y, frame=None):
-        if isinstance(image, str):
-            image = self.assets[image]
-        px = x * TILE_WIDTH
-        py = y * TILE_HEIGHT
-
-        if frame is not None:
-            image = image[frame]
-
-        self.screen.blit(image, (px, py))
-
-    def render_map(self):
-        for x in range(SCREEN_WIDTH_TILES):
-            for y in range(SCREEN_HEIGHT_TILES):
-                (mapx, mapy) = (self.world.player.pos.x + x -
-                                int(SCREEN_WIDTH_TILES / 2),
-                                self.world.player.pos.y + y -
-                                int(SCREEN_HEIGHT_TILES / 2 - 1))
-                if mapx < 0 or mapx >= self.world.WIDTH_TILES or mapy < 0 \
-                        or mapy >= self.world.HEIGHT_TILES:
-                    self._draw_image_at('water', x, y)
-                elif self.world.MAP[mapy][mapx] == '.':
-                    frame = self.world.GROUND_LAYER[mapy][mapx]['tileidx']
-                    ground = 'summerground'
-                    self._draw_image_at(ground, x, y, frame=frame)
-                elif self.world.MAP[mapy][mapx] == '#':
-                    tree = 'tree'
-                    self._draw_image_at(tree, x, y)
-
-    def render(self):
-        self.render_map()
-
-        # Draw player
-        self._draw_image_at(
-            'fox',
-            int(SCREEN_WIDTH_TILES / 2),
-            int(SCREEN_HEIGHT_TILES / 2 - 1),
-            frame=self.world.player.facing.value-1)
-
-        # Scale logical screen to fit window display.
-        display_width = self.display_screen.get_width()
-        display_height = self.display_screen.get_height()
-        scale_x = display_width / SCREEN_WIDTH
-        scale_y = display_height / SCREEN_HEIGHT
-        scale = min(scale_x, scale_y)
-
-        if scale != 1:
-            scaled_width = int(SCREEN_WIDTH * scale)
-            scaled_height = int(SCREEN_HEIGHT * scale)
-            screen_x = int((display_width - scaled_width) / 2)
-            screen_y = int((display_height - scaled_height) / 2)
-
-            scaled_screen = pg.transform.scale(
-                self.screen, (scaled_width, scaled_height))
-        else:
-            screen_x, screen_y = 0, 0
-            scaled_screen = self.screen
-
+        super().__init__(game_id, map, network)
+
+    def load_world(self, m):
+        super().load_world(m)
+        self.chunk_cache.clear()
+        self.chunk_map_version = self.world.map_version
+
+    def load_assets(self, cache_dir=ASSET_CACHE_DIR):
+        self.atlas = load_atlas(ASSETS, resource_dir(), TILE_WIDTH,
+                                TILE_HEIGHT, cache_dir)
+        # Frames of the atlas drawn by number.
+        self.water_tile = self.atlas.index('water')
+        self.tree_tile = self.atlas.index('tree')
+        self.ground_tile = self.atlas.index('summerground')
+        self.fox_tile = self.atlas.index('fox')
+        self._present_at(self.display_screen.get_size())
+
+    # Fits the game to a window of the given size, keeping its aspect ratio.
+    # Tiles are scaled to a whole number of pixels, so that they meet
+    # without gaps, and the game is centred with black bars around it.
+    def _present_at(self, size):
+        display_width, display_height = size
+        scale = min(display_width / SCREEN_WIDTH,
+                    display_height / SCREEN_HEIGHT)
+        self.tile_width = max(1, int(TILE_WIDTH * scale))
+        self.tile_height = max(1, int(TILE_HEIGHT * scale))
+        width = self.tile_width * SCREEN_WIDTH_TILES
+        height = self.tile_height * SCREEN_HEIGHT_TILES
+        self.view_rect = pg.rect.Rect((display_width - width) // 2,
+                                      (display_height - height) // 2,
+                                      width, height)
+
+        self.scaled_atlas = self.atlas.scaled(self.tile_width,
+                                              self.tile_height)
+        self.chunk_cache.clear()
+        self.display_size = size
         self.display_screen.fill((0, 0, 0))
-        self.display_screen.blit(scaled_screen, (screen_x, screen_y))
-
-        pg.display.update()
-
-    def _move_in_direction(self, pos, direction):
+        self.last_frame = None
+        self.full_update = True
+
+    # Called on VIDEORESIZE, after which the display surface may be a new
+    # one.
+    def resize(self):
+        surface = pg.display.get_surface()
+        if surface is not None:
+            self.display_screen = surface
+        self.display_size = None
+
+    # Draws frame tile of the atlas at view tile coordinates x and y, or at
+    # tile coordinates of surface if given.
+    def _draw_image_at(self, tile, x, y, surface=None):
+        if surface is None:
+            surface = self.display_screen
+            left, top = self.view_rect.topleft
+        else:
+            left, top = 0, 0
+        px = left + round(x * self.tile_width)
+        py = top + round(y * self.tile_height)
+        atlas = self.scaled_atlas
+        surface.blit(atlas.surface, (px, py), atlas.rects[tile])
+
+    def _render_chunk(self, cx, cy):
+        chunk = pg.Surface((CHUNK_TILES * self.tile_width,
+                            CHUNK_TILES * self.tile_height)).convert()
+        terrain, ground, origin = self.world.region(
+            cx * CHUNK_TILES, cy * CHUNK_TILES, CHUNK_TILES, CHUNK_TILES)
+        terrain, ground = terrain.tolist(), ground.tolist()
+        # Chunk coordinates of the part of the chunk inside the world.
+        left = origin.x - cx * CHUNK_TILES
+        top = origin.y - cy * CHUNK_TILES
+        water, tree, ground_tile = \
+            self.water_tile, self.tree_tile, self.ground_tile
+
+        for x in range(CHUNK_TILES):
+            for y in range(CHUNK_TILES):
+                row = y - top
+                col = x - left
+                if row < 0 or row >= len(terrain) or col < 0 \
+                        or col >= len(terrain[row]):
+                    self._draw_image_at(water, x, y, surface=chunk)
+                elif terrain[row][col] == TREE:
+                    self._draw_image_at(tree, x, y, surface=chunk)
+                else:
+                    self._draw_image_at(ground_tile + ground[row][col], x, y,
+                                        surface=chunk)
+        return chunk
+
+    # Map coordinates of the tile drawn in the top-left corner. The view
+    # follows the player, alpha of the way from where it was before the
+    # last tick, unless it jumped.
+    def _view_origin(self, alpha=1.0):
+        pos, previous = self.world.player.pos, self.previous_player_pos
         x, y = pos.x, pos.y
-        if direction == Direction.UP:
-            y -= 1
-        elif direction == Direction.DOWN:
-            y += 1
-        elif direction == Direction.LEFT:
-            x -= 1
-        elif direction == Direction.RIGHT:
-            x += 1
-        x = max(0, min(self.world.WIDTH_TILES - 1, x))
-        y = max(0, min(self.world.HEIGHT_TILES - 1, y))
-        return Point(x, y)
-
-    def move(self, key):
-        self.new_pos = self._move_in_direction(self.new_pos, key)
-
-    def face(self, key):
-        self.world.player.facing = key
-
-    def rotate(self, direction):
-        # TODO: fix spritesheet and enum order to allow
-        # this to be done with modular arithmetic.
-        if direction == Rotation.Clockwise:
-            rmap = {
-                Direction.DOWN: Direction.LEFT,
-                Direction.LEFT: Direction.UP,
-                Direction.UP: Direction.RIGHT,
-                Direction.RIGHT: Direction.DOWN,
-            }
-        elif direction == Rotation.CounterClockwise:
-            rmap = {
-                Direction.DOWN: Direction.RIGHT,
-                Direction.RIGHT: Direction.UP,
-                Direction.UP: Direction.LEFT,
-                Direction.LEFT: Direction.DOWN,
-            }
-        self.world.player.facing = rmap[self.world.player.facing]
-
-    def _facing(self):
-        facingx, facingy = self.world.player.pos.x, self.world.player.pos.y
-        if self.world.player.facing == Direction.UP:
-            return facingx, facingy-1
-        elif self.world.player.facing == Direction.DOWN:
-            return facingx, facingy+1
-        elif self.world.player.facing == Direction.LEFT:
-            return facingx-1, facingy
-        elif self.world.player.facing == Direction.RIGHT:
-            return facingx+1, facingy
-
-    def action(self, action):
-        facingx, facingy = self._facing()
-        facing = Point(facingx, facingy)
-
-    def tick(self):
-        # If we're moving in a cardinal direction, face that way
-        if self.new_pos.x != self.world.player.pos.x \
-                and self.new_pos.y == self.world.player.pos.y:
-            self.world.player.facing = Direction.LEFT \
-                if self.new_pos.x < self.world.player.pos.x \
-                else Direction.RIGHT
-        elif self.new_pos.y != self.world.player.pos.y \
-                and self.new_pos.x == self.world.player.pos.x:
-            self.world.player.facing = Direction.UP \
-                if self.new_pos.y < self.world.player.pos.y \
-                else Direction.DOWN
-
-        if self.world.player.can_move_to(self.world, self.new_pos):
-            self.world.player.pos = self.new_pos
+        if alpha < 1 and abs(pos.x - previous.x) <= 1 and \
+                abs(pos.y - previous.y) <= 1:
+            x = previous.x + (pos.x - previous.x) * alpha
+            y = previous.y + (pos.y - previous.y) * alpha
+        return (x - int(SCREEN_WIDTH_TILES / 2),
+                y - int(SCREEN_HEIGHT_TILES / 2 - 1))
+
+    # The foxes to draw, remote players and then the player, as (x, y,
+    # tile) in view tile coordinates.
+    def _sprites(self, origin, time_ms=None):
+        left, top = origin
+        if time_ms is None:
+            time_ms = GameTime.current_time_ms()
+        sprites = []
+        for x, y, facing in self.remote_players.positions(time_ms).values():
+            if facing == game_pb2.Position.INVALID:
+                facing = Direction.DOWN.value
+            sprites.append((x - left, y - top, self.fox_tile + facing - 1))
+        sprites.append((int(SCREEN_WIDTH_TILES / 2),
+                        int(SCREEN_HEIGHT_TILES / 2 - 1),
+                        self.fox_tile + self.world.player.facing.value - 1))
+        return sprites
+
+    def _sprite_rect(self, sprite):
+        x, y, _tile = sprite
+        return pg.rect.Rect(self.view_rect.x + round(x * self.tile_width),
+                            self.view_rect.y + round(y * self.tile_height),
+                            self.tile_width, self.tile_height)
+
+    # Draws the sprites, or only those overlapping rect if given.
+    def _render_sprites(self, sprites, rect=None):
+        for sprite in sprites:
+            if rect is None or rect.colliderect(self._sprite_rect(sprite)):
+                x, y, tile = sprite
+                self._draw_image_at(tile, x, y)
+
+    def render_map(self, origin=None):
+        if self.chunk_map_version != self.world.map_version:
+            self.chunk_cache.clear()
+            self.chunk_map_version = self.world.map_version
+
+        left, top = origin if origin is not None else self._view_origin()
+
+        right = math.ceil(left) + SCREEN_WIDTH_TILES - 1
+        bottom = math.ceil(top) + SCREEN_HEIGHT_TILES - 1
+
+        view_x, view_y = self.view_rect.topleft
+        for cx in range(math.floor(left) // CHUNK_TILES,
+                        right // CHUNK_TILES + 1):
+            for cy in range(math.floor(top) // CHUNK_TILES,
+                            bottom // CHUNK_TILES + 1):
+                chunk = self.chunk_cache.get(cx, cy)
+                self.display_screen.blit(chunk, (
+                    view_x + round((cx * CHUNK_TILES - left) *
+                                   self.tile_width),
+                    view_y + round((cy * CHUNK_TILES - top) *
+                                   self.tile_height)))
+
+    def render_loading(self):
+        draw_loading(self.display_screen, self.view_rect)
+
+    # Draws the game alpha of the way from the state before the last tick
+    # to the state after it, with time_ms being the game time at that point.
+    #
+    # Only the parts of the window that changed are drawn and updated: the
+    # black bars around the game once after a resize, nothing if the frame
+    # is the same as the last one, and only around the foxes that moved if
+    # the view did not.
+    def render(self, alpha=1.0, time_ms=None):
+        if self.display_screen.get_size() != self.display_size:
+            self._present_at(self.display_screen.get_size())
+        screen = self.display_screen
+
+        if self.world is None:
+            frame = LOADING_FRAME
         else:
-            self.new_pos = self.world.player.pos
-
+            origin = self._view_origin(alpha)
+            sprites = self._sprites(origin, time_ms)
+            frame = (origin, self.world.map_version, sprites)
+        if frame == self.last_frame:
+            return
+        last, self.last_frame = self.last_frame, frame
+
+        screen.set_clip(self.view_rect)
+        if self.world is None:
+            self.render_loading()
+            dirty = [self.view_rect]
+        elif last is not None and last is not LOADING_FRAME and \
+                last[:2] == frame[:2]:
+            before, after = set(last[2]), set(sprites)
+            dirty = [self._sprite_rect(sprite)
+                     for sprite in before.symmetric_difference(after)]
+            # Each is drawn over from the map up, as drawing a fox again on
+            # top of itself would blend its edges twice.
+            for rect in dirty:
+                screen.set_clip(rect.clip(self.view_rect))
+                self.render_map(origin)
+                self._render_sprites(sprites, rect)
+        else:
+            self.render_map(origin)
+            self._render_sprites(sprites)
+            dirty = [self.view_rect]
+        screen.set_clip(None)
+
+        if self.full_update:
+            pg.display.update()
+            self.full_update = False
+        else:
+            pg.display.update(dirty)
 
-class ScheduledEvent:
-    def __init__(self, action, period):
-        self.action = action
-        self.period = period
-        self.last_timestamp = GameTime.current_time_ms()
+    # The part of the world this client draws, for the server to pick the
+    # players it sends.
+    def area_of_interest(self):
+        view_size = game_pb2.Size(width=SCREEN_WIDTH_TILES,
+                                  height=SCREEN_HEIGHT_TILES)
+        return game_pb2.AreaOfInterest(player_id=self.player_id,
+                                       view_size=view_size)
 
 
 def main(args):
-    pg.init()
+    parser = argparse.ArgumentParser(description="Play the game.")
+    parser.add_argument('game_id', type=int, nargs='?',
+                        help="join this game rather than starting one")
+    parser.add_argument('--simulation-rate', type=float,
+                        default=SIMULATION_RATE,
+                        help="simulation steps a second")
+    parser.add_argument('--frame-rate', type=int, default=FRAME_RATE,
+                        help="most frames drawn a second, 0 for no limit")
+    parser.add_argument('--max-catch-up-steps', type=int,
+                        default=MAX_CATCH_UP_STEPS)
+    parser.add_argument('--asset-cache', default=ASSET_CACHE_DIR,
+                        help="directory to keep the processed assets in")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print how long each step of startup took")
+    args = parser.parse_args(args)
+    report = startup.StartupReport()
+    report.step('imports')
+
+    # Only the parts of pygame the game uses.
+    pg.display.init()
     pg.font.init()
 
     screen = pg.display.set_mode(SCREENRECT.size, pg.RESIZABLE)
     clock = pg.time.Clock()
 
     pg.display.set_caption('multiplayer test')
-
-    game_id = int(args[0]) if len(args) > 0 else None
-    game = Game(screen, game_id)
-    game.load_assets()
-
-    last_move_timestamp = 0
+    report.step('window')
+
+    # Something to look at while the rest starts up.
+    draw_loading(screen, screen.get_rect())
+    pg.display.update()
+    report.first_frame()
+
+    worker = network.NetworkWorker()
+    worker.start()
+    report.step('network')
+    game = Game(screen, args.game_id, worker)
+    game.load_assets(args.asset_cache)
+    report.step('assets')
+    # Whether the report still has to wait for the first frame of the map.
+    reporting = args.startup_report
+    timestep = FixedTimestep(args.simulation_rate, args.max_catch_up_steps)
 
     doquit = False
     while not doquit:
         for event in pg.event.get():
             if event.type == pg.QUIT:
                 doquit = True
+            elif event.type == pg.VIDEORESIZE:
+                game.resize()
+            elif event.type in EXPOSE_EVENTS:
+                game.last_frame = None
+                game.full_update = True
             if game.controllers[game.state].handle(event, game):
                 doquit = True
                 break
 
-        game.controllers[game.state].tick(game, clock)
+        game.poll_network()
+        for _step in range(timestep.advance(clock.get_time())):
+            game.controllers[game.state].tick(game, timestep.step_ms)
 
-        game.render()
+        # The game time of the state being drawn, for remote players.
+        time_ms = GameTime.current_time_ms() - \
+            (1 - timestep.alpha) * timestep.step_ms
+        game.render(timestep.alpha, time_ms)
+        if reporting and game.world is not None:
+            report.step('map')
+            report.print()
+            reporting = False
 
-        clock.tick(30)
+        clock.tick(args.frame_rate)
 
+    if reporting:
+        report.print()
     pg.quit()
+    worker.stop()
+    connection.close_connections()
 
 
 if __name__ == '__main__':
@@ -1,36 +1,177 @@
-import grpc
+import os
+import re
+import struct
+
+import numpy as np
 
 import game_pb2
-import game_pb2_grpc
+
+from connection import get_async_connection, get_connection, SERVER_ADDRESS
+from files import write_atomically
+from world import TREE
+
+
+# Maps received from servers are kept here, and only downloaded again if
+# the server says they changed.
+MAP_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache',
+                             'multiplayer-test', 'maps')
+
+
+# Decodes a Map into a 2D array of terrain codes for World. Slicing copies
+# the cells out of the message in one go, which is much faster than
+# iterating over the repeated field.
+def decode_map(world_map):
+    world_size = world_map.map_size
+
+    cells = world_map.cells
+    assert(len(cells) == world_size.width * world_size.height)
+    terrain = np.frombuffer(bytes(cells[:]), dtype=np.uint8)
+    return np.minimum(terrain, TREE).reshape(world_size.height,
+                                             world_size.width)
+
+
+# Terrain arrays of the games of each server, kept one to a file along
+# with their Map.hash. A file is a MAP_HEADER, giving the width, height and
+# length of the hash, then the hash, then the terrain one byte a tile, row
+# by row, so that it can be memory-mapped as it is.
+class MapCache:
+    MAGIC = b'MAP1'
+    MAP_HEADER = struct.Struct('<4sIIH')
+
+    def __init__(self, directory=MAP_CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, address, game_id):
+        server = re.sub(r'[^\w.-]', '_', address)
+        return os.path.join(self.directory, f"{server}-{game_id}.map")
+
+    # The terrain and hash of a game's map, or None if it is not cached.
+    # The terrain is mapped copy-on-write, so changing it leaves the file
+    # alone.
+    def load(self, address, game_id):
+        path = self._path(address, game_id)
+        try:
+            with open(path, 'rb') as f:
+                magic, width, height, hash_length = \
+                    self.MAP_HEADER.unpack(f.read(self.MAP_HEADER.size))
+                map_hash = f.read(hash_length)
+            offset = self.MAP_HEADER.size + hash_length
+            if magic != self.MAGIC or len(map_hash) != hash_length or \
+                    os.path.getsize(path) != offset + width * height:
+                return None
+            terrain = np.memmap(path, dtype=np.uint8, mode='c',
+                                offset=offset, shape=(height, width))
+        except (OSError, ValueError, struct.error):
+            return None
+        return terrain, map_hash
+
+    def store(self, address, game_id, terrain, map_hash):
+        height, width = terrain.shape
+        header = self.MAP_HEADER.pack(self.MAGIC, width, height,
+                                      len(map_hash))
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            write_atomically(
+                self._path(address, game_id), header, map_hash,
+                np.ascontiguousarray(terrain, np.uint8).tobytes())
+        except OSError:
+            pass
+
+
+MAP_CACHE = MapCache()
+
+
+def _start_request():
+    world_size = game_pb2.Size(width=30, height=30)
+    return game_pb2.StartGameRequest(world_size=world_size)
 
 
-def get_map(game_id):
-    channel = grpc.insecure_channel('localhost:50051')
-    service = game_pb2_grpc.GameStub(channel)
+def _play_request(game_id, cached):
+    return game_pb2.PlayGameRequest(
+        game_id=game_id, known_map_hash=cached[1] if cached else b'')
 
+
+# The terrain of a map received from a server, which is the cached one if
+# the server only sent its hash. Maps that come with a hash are cached.
+def _received_map(world_map, address, game_id, cache, cached):
+    if cached is not None and not world_map.cells and \
+            world_map.hash == cached[1]:
+        return cached[0]
+    terrain = decode_map(world_map)
+    if cache is not None and world_map.hash:
+        cache.store(address, game_id, terrain, world_map.hash)
+    return terrain
+
+
+# The map of a game as (terrain, game_id, map_hash), starting a new one if
+# game_id is None. With a cache, a map fetched before is only sent again if
+# it changed. The hash is empty if the server sent none.
+def get_map(game_id, address=SERVER_ADDRESS, cache=MAP_CACHE):
+    connection = get_connection(address)
+    service = connection.stub
+
+    cached = None
     if game_id is None:
-        world_size = game_pb2.Size(width=30, height=30)
-        request = game_pb2.StartGameRequest(world_size=world_size)
-        response = service.StartGame(request)
+        response = service.StartGame(_start_request(),
+                                     timeout=connection.deadline)
         game_id = response.game_id
         world_map = response.world_map
     else:
-        request = game_pb2.PlayGameRequest(game_id=game_id)
-        response = service.PlayGame(request)
+        if cache is not None:
+            cached = cache.load(address, game_id)
+        response = service.PlayGame(_play_request(game_id, cached),
+                                    timeout=connection.deadline)
         world_map = response.game_state.world_map
 
-    world_size = world_map.map_size
+    return _received_map(world_map, address, game_id, cache, cached), \
+        game_id, world_map.hash
 
-    cells = world_map.cells
-    assert(len(cells) == world_size.width * world_size.height)
-    idx = 0
-    output = ''
-    for y in range(world_size.height):
-        for x in range(world_size.width):
-            if cells[idx] == 0:
-                output += '.'
-            else:
-                output += '#'
-            idx += 1
-        output += '\n'
-    return output.splitlines(), game_id
+
+# get_map for grpc.aio, on the running event loop.
+async def get_map_async(game_id, address=SERVER_ADDRESS, cache=MAP_CACHE):
+    connection = get_async_connection(address)
+    service = connection.stub
+
+    cached = None
+    if game_id is None:
+        response = await service.StartGame(_start_request(),
+                                           timeout=connection.deadline)
+        game_id = response.game_id
+        world_map = response.world_map
+    else:
+        if cache is not None:
+            cached = cache.load(address, game_id)
+        response = await service.PlayGame(_play_request(game_id, cached),
+                                          timeout=connection.deadline)
+        world_map = response.game_state.world_map
+
+    return _received_map(world_map, address, game_id, cache, cached), \
+        game_id, world_map.hash
+
+
+# Streams the GameStateUpdates of a game, which GameStateMirror.apply
+# turns back into the full game state.
+def subscribe_game(game_id, address=SERVER_ADDRESS, area_of_interest=None):
+    service = get_connection(address).stub
+    request = game_pb2.SubscribeGameRequest(
+        game_id=game_id, area_of_interest=area_of_interest)
+    return service.SubscribeGame(request)
+
+
+class GameStateMirror:
+    def __init__(self):
+        self.map = None
+        self.players = {}
+        self.tick = 0
+
+    def apply(self, update):
+        if update.HasField('world_map'):
+            self.map = decode_map(update.world_map)
+            self.players = {}
+        for player in update.players:
+            self.players[player.player_id] = player
+        for player_id in update.removed_player_ids:
+            self.players.pop(player_id, None)
+        for player_id in update.left_player_ids:
+            self.players.pop(player_id, None)
+        self.tick = update.tick
@@ -0,0 +1,38 @@
+import random
+
+
+# Map size limits, as in server/src/map.rs.
+MAP_WIDTH_MIN = 10
+MAP_WIDTH_MAX = 100
+MAP_HEIGHT_MIN = 10
+MAP_HEIGHT_MAX = 100
+
+
+# Mirrors the wall generation done by StartGame in server/src/server.rs.
+def generate_cells(width, height, rng=random):
+    cells = [0] * (width * height)
+
+    nwalls = rng.randrange(10, 40)
+    for _w in range(nwalls):
+        vertical = rng.randrange(0, 2) == 0
+        if vertical:
+            length = rng.randrange(4, height // 2)
+            x = rng.randrange(0, width)
+            y = rng.randrange(0, height - length)
+            for i in range(length):
+                cells[(y + i) * width + x] = 1
+        else:
+            length = rng.randrange(4, width // 2)
+            x = rng.randrange(0, width - length)
+            y = rng.randrange(0, height)
+            for i in range(length):
+                cells[y * width + x + i] = 1
+    return cells
+
+
+def random_empty_cell(cells, width, height, rng=random):
+    while True:
+        x = rng.randrange(0, width)
+        y = rng.randrange(0, height)
+        if cells[y * width + x] == 0:
+            return x, y
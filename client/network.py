@@ -0,0 +1,168 @@
+import asyncio
+import threading
+from collections import deque
+
+import grpc
+
+import game_pb2
+from connection import close_async_connections, get_async_connection, \
+    SERVER_ADDRESS
+from map import get_map_async
+
+
+# Kinds of result handed to the main loop.
+MAP = 'map'
+GAME_STATE = 'game_state'
+ERROR = 'error'
+
+# Results the main loop has not picked up yet are kept up to this many,
+# after which the oldest are dropped.
+MAX_PENDING_RESULTS = 256
+
+# Seconds to wait before trying again after a failed call.
+RETRY_INTERVAL = 1.0
+
+
+# Runs the game's gRPC calls on a grpc.aio event loop in a thread of its
+# own, so that a slow or unreachable server never holds up a frame. The main
+# loop hands work over with the send methods, which only queue it, and picks
+# up results with poll(). Results travel through a bounded deque, whose
+# append and popleft need no lock.
+#
+# Player state is coalesced: if several updates are sent while a PlayGame
+# call is in flight, only the latest goes out after it. A failed call is
+# tried again unless a newer state has come in meanwhile. Once a game's map
+# has been received PlayGame only asks for its hash, as long as it does not
+# change.
+class NetworkWorker:
+    def __init__(self, address=SERVER_ADDRESS,
+                 max_results=MAX_PENDING_RESULTS):
+        self.address = address
+        self.results = deque(maxlen=max_results)
+        self.loop = None
+        self.thread = None
+        # The latest (game_id, PlayerState, AreaOfInterest) not yet sent,
+        # only touched on the event loop.
+        self._pending_state = None
+        # The hash of the map last received for each game id, which PlayGame
+        # and SubscribeGame send so that the map is not sent back unless it
+        # changed.
+        self._map_hashes = {}
+        self._sender = None
+        self._subscription = None
+
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name='network',
+                                       daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        self.loop.run_until_complete(close_async_connections())
+        self.loop.close()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        self.thread.join()
+        self.thread = None
+
+    async def _shutdown(self):
+        tasks = [task for task in asyncio.all_tasks()
+                 if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop.stop()
+
+    # Everything received since the last call, as (kind, result) pairs.
+    def poll(self):
+        results = []
+        while True:
+            try:
+                results.append(self.results.popleft())
+            except IndexError:
+                return results
+
+    def _report_error(self, call, error):
+        self.results.append((ERROR, (call, error)))
+
+    # Fetches the map of a game, starting a new one if game_id is None. The
+    # result is a MAP of (terrain, game_id). Failed attempts are retried.
+    def request_map(self, game_id):
+        asyncio.run_coroutine_threadsafe(self._request_map(game_id),
+                                         self.loop)
+
+    async def _request_map(self, game_id):
+        while True:
+            try:
+                terrain, game_id, map_hash = await get_map_async(
+                    game_id, self.address)
+            except grpc.aio.AioRpcError as error:
+                self._report_error('get_map', error)
+                await asyncio.sleep(RETRY_INTERVAL)
+                continue
+            if map_hash:
+                self._map_hashes[game_id] = map_hash
+            self.results.append((MAP, (terrain, game_id)))
+            return
+
+    def send_state(self, game_id, player_state, area_of_interest=None):
+        self.loop.call_soon_threadsafe(self._queue_state, game_id,
+                                       player_state, area_of_interest)
+
+    def _queue_state(self, game_id, player_state, area):
+        self._pending_state = (game_id, player_state, area)
+        if self._sender is None or self._sender.done():
+            self._sender = self.loop.create_task(self._send_states())
+
+    async def _send_states(self):
+        connection = get_async_connection(self.address)
+        while self._pending_state is not None:
+            state = self._pending_state
+            self._pending_state = None
+            game_id, player_state, area = state
+            request = game_pb2.PlayGameRequest(
+                game_id=game_id, player_state_update=player_state,
+                area_of_interest=area,
+                known_map_hash=self._map_hashes.get(game_id, b''))
+            try:
+                response = await connection.stub.PlayGame(
+                    request, timeout=connection.deadline)
+            except grpc.aio.AioRpcError as error:
+                self._report_error('PlayGame', error)
+                if self._pending_state is None:
+                    self._pending_state = state
+                await asyncio.sleep(RETRY_INTERVAL)
+                continue
+            map_hash = response.game_state.world_map.hash
+            if map_hash:
+                self._map_hashes[game_id] = map_hash
+
+    # Streams the GameStateUpdates of a game as GAME_STATE results, in
+    # place of any earlier subscription. If the stream breaks it is opened
+    # again, starting over with the full state. The map in the first
+    # update is only its hash if the map was received before.
+    def subscribe(self, game_id, area_of_interest=None):
+        asyncio.run_coroutine_threadsafe(
+            self._subscribe(game_id, area_of_interest), self.loop)
+
+    async def _subscribe(self, game_id, area):
+        if self._subscription is not None:
+            self._subscription.cancel()
+        self._subscription = asyncio.current_task()
+
+        connection = get_async_connection(self.address)
+        while True:
+            request = game_pb2.SubscribeGameRequest(
+                game_id=game_id, area_of_interest=area,
+                known_map_hash=self._map_hashes.get(game_id, b''))
+            try:
+                async for update in connection.stub.SubscribeGame(request):
+                    self.results.append((GAME_STATE, update))
+            except grpc.aio.AioRpcError as error:
+                self._report_error('SubscribeGame', error)
+            await asyncio.sleep(RETRY_INTERVAL)
@@ -3,14 +3,28 @@ import math
 from queue import PriorityQueue
 import random
 
-from astar import find_path_astar
+import numpy as np
+
+from astar import find_path_astar, METHOD_ASTAR
 from geometry import Direction, pdist, Point
 
 
 class Character(ABC):
     def __init__(self, pos, facing):
-        self.pos = pos
+        self._pos = pos
         self.facing = facing
+        # The World.characters index this character is in, if any.
+        self.spatial_index = None
+
+    @property
+    def pos(self):
+        return self._pos
+
+    @pos.setter
+    def pos(self, pos):
+        old, self._pos = self._pos, pos
+        if self.spatial_index is not None:
+            self.spatial_index.move(self, old, pos)
 
     def move_to(self, dst):
         self.face_towards(dst)
@@ -35,8 +49,33 @@ class Character(ABC):
             return False
         return self._can_move_to(world, pos)
 
-    def find_path_astar(self, world, dst, within=0):
-        return find_path_astar(world, self.pos, dst, self, within)
+    # Cells of the world this class of character can move to, as a boolean
+    # array. Subclasses should override this with a vectorized version.
+    @classmethod
+    def passable_mask(cls, world):
+        return np.array([[bool(cls._can_move_to(world, Point(x, y)))
+                          for x in range(world.WIDTH_TILES)]
+                         for y in range(world.HEIGHT_TILES)], dtype=bool)
+
+    def find_path_astar(self, world, dst, within=0, method=METHOD_ASTAR):
+        # Paths only depend on the endpoints and on how this class of
+        # character decides passability, so they are shared between all
+        # characters of a class through the world's path cache.
+        key = (self.pos, dst, within, method, type(self)._can_move_to)
+        hit, path = world.path_cache.get(key, world.map_version)
+        if not hit:
+            path = find_path_astar(world, self.pos, dst, self, within, method)
+            if path is not None:
+                path = tuple(path)
+            world.path_cache.put(key, world.map_version, path)
+        return list(path) if path is not None else None
+
+    def follow_flow_field(self, field):
+        step = field.next_step(self.pos)
+        if step is None:
+            return False
+        self.move_to(step)
+        return True
 
 
 class NPC(Character):
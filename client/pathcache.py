@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+
+MAX_CACHED_PATHS = 256
+
+
+class PathCache:
+    def __init__(self, capacity=MAX_CACHED_PATHS):
+        self.capacity = capacity
+        self.paths = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self.paths:
+                self.invalidations += 1
+                self.paths.clear()
+            self.version = version
+
+    # Returns (True, path) on a hit, where path is None if no path exists,
+    # or (False, None) on a miss.
+    def get(self, key, version):
+        self._check_version(version)
+        try:
+            path = self.paths[key]
+        except KeyError:
+            self.misses += 1
+            return False, None
+        self.paths.move_to_end(key)
+        self.hits += 1
+        return True, path
+
+    def put(self, key, version, path):
+        self._check_version(version)
+        self.paths[key] = path
+        self.paths.move_to_end(key)
+        if len(self.paths) > self.capacity:
+            self.paths.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.paths.clear()
+
+    def stats(self):
+        return {
+            'size': len(self.paths),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
@@ -13,3 +13,7 @@ class Player(NPC):
     @classmethod
     def _can_move_to(cls, world, pos):
         return not world.is_tree(pos)
+
+    @classmethod
+    def passable_mask(cls, world):
+        return world.passable_mask('#')
@@ -0,0 +1,42 @@
+from collections import deque
+
+
+# Inputs the server has not acknowledged yet are kept in a ring buffer of
+# this many entries. At 30 ticks a second that covers about two seconds of
+# round trip, after which the oldest inputs are dropped.
+MAX_PENDING_INPUTS = 64
+
+
+# Client-side prediction of the player's movement. Inputs are applied
+# locally straight away and tagged with a sequence number. When the server's
+# authoritative state comes back, the inputs it has not seen yet are
+# replayed on top of it, and the player is only moved if that disagrees with
+# what was predicted.
+#
+# step(pos, moves) returns where one tick's worth of moves from pos ends up.
+class MovementPredictor:
+    def __init__(self, step, capacity=MAX_PENDING_INPUTS):
+        self.step = step
+        self.sequence = 0
+        self.acknowledged = 0
+        self.pending = deque(maxlen=capacity)
+        self.corrections = 0
+
+    def apply(self, pos, moves):
+        self.sequence += 1
+        self.pending.append((self.sequence, moves))
+        return self.step(pos, moves)
+
+    def reconcile(self, predicted, pos, sequence):
+        # Acknowledgements can arrive out of order too.
+        if sequence < self.acknowledged:
+            return predicted
+        self.acknowledged = sequence
+        while self.pending and self.pending[0][0] <= sequence:
+            self.pending.popleft()
+
+        for _sequence, moves in self.pending:
+            pos = self.step(pos, moves)
+        if pos != predicted:
+            self.corrections += 1
+        return pos
@@ -0,0 +1,131 @@
+import heapq
+
+
+# What a periodic event does after falling behind, e.g. after a slow frame.
+# CATCH_UP_NONE: the next run is a period after this one ran, as if the
+#   schedule restarted now.
+# CATCH_UP_SKIP: the missed runs are dropped, and the event stays on its
+#   original schedule.
+# CATCH_UP_ALL: every missed run happens, up to the last MAX_MISSED_RUNS of
+#   them in one call of run_due. Each run is passed the time it was due
+#   rather than the current time.
+CATCH_UP_NONE = 'none'
+CATCH_UP_SKIP = 'skip'
+CATCH_UP_ALL = 'all'
+
+MAX_MISSED_RUNS = 10
+
+
+# A handle on an action in a Scheduler. The action is called with the event
+# and the current time, or for CATCH_UP_ALL the time the run was due.
+class ScheduledEvent:
+    def __init__(self, action, period, due, catch_up):
+        self.action = action
+        self.period = period
+        self.due = due
+        self.catch_up = catch_up
+        self.last_timestamp = None
+        self.cancelled = False
+        self.scheduler = None
+        # Whether the event is in its scheduler's heap, which it is not
+        # while its action runs.
+        self.queued = False
+
+    def cancel(self):
+        if self.scheduler is not None:
+            self.scheduler.cancel(self)
+
+
+# Runs one-shot and periodic actions at game times, in ms. Events are kept
+# in a min-heap by due time, so each call of run_due only looks at the
+# events that are due. Cancelled events are left in the heap and skipped,
+# until there are enough of them to be worth clearing out.
+class Scheduler:
+    def __init__(self, clock):
+        self.clock = clock
+        self.heap = []
+        # Cancelled events still in the heap.
+        self.cancelled = 0
+        # Breaks ties between events due at the same time, in the order
+        # they were scheduled.
+        self.sequence = 0
+
+    def __len__(self):
+        return len(self.heap) - self.cancelled
+
+    def _push(self, event):
+        self.sequence += 1
+        event.queued = True
+        heapq.heappush(self.heap, (event.due, self.sequence, event))
+
+    # Runs action after delay ms, and then every period ms if given.
+    def schedule(self, action, delay, period=None, catch_up=CATCH_UP_NONE):
+        if period is not None and period <= 0:
+            raise ValueError(f"Bad period: {period}")
+        event = ScheduledEvent(action, period, self.clock() + delay,
+                               catch_up)
+        event.scheduler = self
+        self._push(event)
+        return event
+
+    def cancel(self, event):
+        if event.cancelled or event.scheduler is not self:
+            return
+        event.cancelled = True
+        event.scheduler = None
+        if not event.queued:
+            return
+        self.cancelled += 1
+        if self.cancelled > len(self.heap) // 2:
+            for _due, _sequence, event in self.heap:
+                event.queued = not event.cancelled
+            # In place, as run_due may be iterating over it.
+            self.heap[:] = [entry for entry in self.heap
+                            if not entry[2].cancelled]
+            heapq.heapify(self.heap)
+            self.cancelled = 0
+
+    def clear(self):
+        for _due, _sequence, event in self.heap:
+            event.cancelled = True
+            event.scheduler = None
+            event.queued = False
+        self.heap.clear()
+        self.cancelled = 0
+
+    # Runs the events that are due by now.
+    def run_due(self, now):
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            due, _sequence, event = heapq.heappop(heap)
+            event.queued = False
+            if event.cancelled:
+                self.cancelled -= 1
+                continue
+
+            timestamp = now
+            if event.catch_up == CATCH_UP_ALL and event.period is not None:
+                # Runs due MAX_MISSED_RUNS periods ago or earlier are
+                # dropped, keeping to the original schedule.
+                oldest = now - MAX_MISSED_RUNS * event.period
+                if due <= oldest:
+                    due += ((oldest - due) // event.period + 1) * \
+                        event.period
+                timestamp = due
+            event.action(event, timestamp)
+            event.last_timestamp = timestamp
+            if event.cancelled:
+                continue
+            if event.period is None:
+                event.cancelled = True
+                event.scheduler = None
+                continue
+
+            period = event.period
+            if event.catch_up == CATCH_UP_SKIP:
+                event.due = due + ((now - due) // period + 1) * period
+            elif event.catch_up == CATCH_UP_ALL:
+                event.due = due + period
+            else:
+                event.due = now + period
+            self._push(event)
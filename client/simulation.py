@@ -0,0 +1,345 @@
+import argparse
+import enum
+import random
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from geometry import Direction, Point, Rotation
+from interpolation import RemotePlayers
+from mapgen import generate_cells
+from player import Player
+from prediction import MovementPredictor
+from scheduler import CATCH_UP_NONE, Scheduler
+from startup import lazy_import
+from world import World
+
+# Not needed until there is a network to talk to, and slow to import.
+if TYPE_CHECKING:
+    import game_pb2
+    import map as map_client
+    import network
+else:
+    game_pb2 = lazy_import('game_pb2')
+    map_client = lazy_import('map')
+    network = lazy_import('network')
+
+
+# Length of a simulated tick in headless runs, in ms. The game runs at 30
+# frames a second.
+TICK_MS = 33
+
+# Simulation steps a second in the windowed game, and the most steps run
+# in one frame to catch up after a slow one.
+SIMULATION_RATE = 30
+MAX_CATCH_UP_STEPS = 5
+
+
+class GameState(enum.Enum):
+    STARTED = 1
+    LOADING = 2
+
+
+# Turns the real time between frames into a whole number of fixed length
+# simulation steps. The time left over, as a fraction of a step, is how far
+# to interpolate between the last two steps when rendering.
+class FixedTimestep:
+    def __init__(self, rate=SIMULATION_RATE, max_steps=MAX_CATCH_UP_STEPS):
+        self.step_ms = 1000 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0
+
+    # The number of steps to run for elapsed_ms of real time.
+    def advance(self, elapsed_ms):
+        self.accumulator += elapsed_ms
+        steps = int(self.accumulator // self.step_ms)
+        if steps > self.max_steps:
+            # Too far behind to ever catch up, so the game slows down
+            # rather than spending every frame simulating.
+            steps = self.max_steps
+            self.accumulator = steps * self.step_ms
+        self.accumulator -= steps * self.step_ms
+        return steps
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.step_ms
+
+
+class GameTime:
+    current_time = 0
+
+    @classmethod
+    def current_time_ms(cls):
+        return cls.current_time
+
+    @classmethod
+    def update(cls, time_delta_ms):
+        cls.current_time += time_delta_ms
+
+
+# The game's state and rules, apart from anything to do with drawing it.
+# Game adds rendering on top. On its own it runs headless, advanced with
+# step() as fast as the CPU allows.
+class Simulation:
+    N_GROUND_TILES = 30
+
+    # The map is fetched from the server unless one is given, as a terrain
+    # array or ASCII rows. With a NetworkWorker, it is fetched in the
+    # background and the game stays LOADING until it arrives, and the
+    # player's state goes to the server as it changes.
+    def __init__(self, game_id=None, map=None, network=None):
+        self.game_id = game_id
+        self.map = map
+        self.network = network
+        # The status code each failing call last failed with, so that a call
+        # failing over and over while the server is down is reported once.
+        self.network_errors = {}
+        self.reset()
+
+    def reset(self):
+        self.scheduler = Scheduler(GameTime.current_time_ms)
+        # The server only knows of the one player for now.
+        self.player_id = 0
+        self.moves = []
+        self.remote_players = RemotePlayers()
+        self.world = None
+
+        if self.map is not None:
+            self.load_world(self.map)
+        elif self.network is not None:
+            self.state = GameState.LOADING
+            self.network.request_map(self.game_id)
+        else:
+            m, self.game_id, _map_hash = map_client.get_map(self.game_id)
+            self.load_world(m)
+
+    def load_world(self, m):
+        self.world = World(m, self.N_GROUND_TILES)
+        # Where the player was before the last tick.
+        self.previous_player_pos = self.world.player.pos
+        self.prediction = MovementPredictor(self._step)
+        self.sent_state = None
+        self.state = GameState.STARTED
+        if self.network is not None:
+            self.network.subscribe(self.game_id, self.area_of_interest())
+
+    # Handles what the network worker received since the last call.
+    def poll_network(self):
+        if self.network is None:
+            return
+        for kind, result in self.network.poll():
+            if kind == network.MAP:
+                self.network_errors.pop('get_map', None)
+                m, self.game_id = result
+                self.load_world(m)
+            elif kind == network.GAME_STATE:
+                self.network_errors.pop('SubscribeGame', None)
+                if self.world is not None:
+                    self.on_game_state_update(result)
+            elif kind == network.ERROR:
+                call, error = result
+                if self.network_errors.get(call) != error.code():
+                    self.network_errors[call] = error.code()
+                    print(f"{call} failed: {error.code()} "
+                          f"{error.details()}")
+
+    # Sends the player's state to the server if it changed since it was
+    # last sent.
+    def send_state(self):
+        if self.network is None:
+            return
+        player = self.world.player
+        state = (player.pos, player.facing, self.prediction.sequence)
+        if state != self.sent_state:
+            self.network.send_state(self.game_id, self.player_state_update(),
+                                    self.area_of_interest())
+            self.sent_state = state
+
+    # Runs action every period ms, returning a handle to cancel it with.
+    def _schedule_event(self, action, period, catch_up=CATCH_UP_NONE):
+        return self.scheduler.schedule(action, period, period, catch_up)
+
+    def run_scheduled_events(self, current_timestamp):
+        self.scheduler.run_due(current_timestamp)
+
+    # Advances simulated time by time_delta_ms and runs one tick.
+    def step(self, time_delta_ms=TICK_MS):
+        GameTime.update(time_delta_ms)
+        self.run_scheduled_events(GameTime.current_time_ms())
+        self.tick()
+
+    def _move_in_direction(self, pos, direction):
+        x, y = pos.x, pos.y
+        if direction == Direction.UP:
+            y -= 1
+        elif direction == Direction.DOWN:
+            y += 1
+        elif direction == Direction.LEFT:
+            x -= 1
+        elif direction == Direction.RIGHT:
+            x += 1
+        x = max(0, min(self.world.WIDTH_TILES - 1, x))
+        y = max(0, min(self.world.HEIGHT_TILES - 1, y))
+        return Point(x, y)
+
+    def move(self, key):
+        self.moves.append(key)
+
+    def _target(self, pos, moves):
+        for direction in moves:
+            pos = self._move_in_direction(pos, direction)
+        return pos
+
+    # Where the player ends up after one tick of moves, which is also how
+    # the prediction replays inputs the server has not acknowledged yet.
+    def _step(self, pos, moves):
+        new_pos = self._target(pos, moves)
+        if self.world.player.can_move_to(self.world, new_pos):
+            return new_pos
+        return pos
+
+    # The part of the world this client is interested in, or None for all
+    # of it.
+    def area_of_interest(self):
+        return None
+
+    # The player's state for PlayGameRequest.player_state_update, tagged
+    # with the last input applied to it.
+    def player_state_update(self):
+        player = self.world.player
+        position = game_pb2.Position(x=player.pos.x, y=player.pos.y,
+                                     facing=player.facing.value)
+        return game_pb2.PlayerState(
+            player_id=self.player_id, position=position,
+            input_sequence=self.prediction.sequence)
+
+    def on_game_state_update(self, update):
+        self.remote_players.apply(update, GameTime.current_time_ms(),
+                                  self.player_id)
+        for state in update.players:
+            self.on_player_state(state)
+
+    def on_player_state(self, state):
+        if state.player_id != self.player_id:
+            return
+        pos = Point(state.position.x, state.position.y)
+        self.world.player.pos = self.prediction.reconcile(
+            self.world.player.pos, pos, state.input_sequence)
+
+    def face(self, key):
+        self.world.player.facing = key
+
+    def rotate(self, direction):
+        # TODO: fix spritesheet and enum order to allow
+        # this to be done with modular arithmetic.
+        if direction == Rotation.Clockwise:
+            rmap = {
+                Direction.DOWN: Direction.LEFT,
+                Direction.LEFT: Direction.UP,
+                Direction.UP: Direction.RIGHT,
+                Direction.RIGHT: Direction.DOWN,
+            }
+        elif direction == Rotation.CounterClockwise:
+            rmap = {
+                Direction.DOWN: Direction.RIGHT,
+                Direction.RIGHT: Direction.UP,
+                Direction.UP: Direction.LEFT,
+                Direction.LEFT: Direction.DOWN,
+            }
+        self.world.player.facing = rmap[self.world.player.facing]
+
+    def _facing(self):
+        facingx, facingy = self.world.player.pos.x, self.world.player.pos.y
+        if self.world.player.facing == Direction.UP:
+            return facingx, facingy-1
+        elif self.world.player.facing == Direction.DOWN:
+            return facingx, facingy+1
+        elif self.world.player.facing == Direction.LEFT:
+            return facingx-1, facingy
+        elif self.world.player.facing == Direction.RIGHT:
+            return facingx+1, facingy
+
+    def action(self, action):
+        facingx, facingy = self._facing()
+        facing = Point(facingx, facingy)
+
+    def tick(self):
+        player = self.world.player
+        self.previous_player_pos = player.pos
+        new_pos = self._target(player.pos, self.moves)
+
+        # If we're moving in a cardinal direction, face that way
+        if new_pos.x != player.pos.x and new_pos.y == player.pos.y:
+            player.facing = Direction.LEFT if new_pos.x < player.pos.x \
+                else Direction.RIGHT
+        elif new_pos.y != player.pos.y and new_pos.x == player.pos.x:
+            player.facing = Direction.UP if new_pos.y < player.pos.y \
+                else Direction.DOWN
+
+        if self.moves:
+            player.pos = self.prediction.apply(player.pos, tuple(self.moves))
+            self.moves = []
+        self.send_state()
+
+
+# A world of size x size tiles generated the way the server does it.
+def generate_map(size, rng):
+    cells = generate_cells(size, size, rng)
+    return np.array(cells, dtype=np.uint8).reshape(size, size)
+
+
+# Runs a simulation without a display, with the player pressing random
+# movement keys and some NPCs wandering about, and reports how many ticks a
+# second it managed.
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the game headless, as fast as possible.")
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--tick-ms', type=int, default=TICK_MS)
+    parser.add_argument('--size', type=int, default=30,
+                        help="size of the generated map")
+    parser.add_argument('--server', action='store_true',
+                        help="get the map from the server instead")
+    parser.add_argument('--game-id', type=int)
+    parser.add_argument('--npcs', type=int, default=100)
+    parser.add_argument('--npc-period', type=int, default=100,
+                        help="ms between NPC moves")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    world_map = None if args.server else generate_map(args.size, rng)
+    simulation = Simulation(args.game_id, world_map)
+    world = simulation.world
+
+    npcs = []
+    for _ in range(args.npcs):
+        npc = Player(world.random_point(), Direction.DOWN)
+        world.add_character(npc)
+        npcs.append(npc)
+
+    def move_npcs(event, timestamp):
+        for npc in npcs:
+            npc.move_randomly(simulation)
+    simulation._schedule_event(move_npcs, args.npc_period)
+
+    directions = list(Direction)
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        if rng.random() < 0.5:
+            simulation.move(rng.choice(directions))
+        simulation.step(args.tick_ms)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.ticks} ticks ({args.ticks * args.tick_ms / 1000:.0f} s "
+          f"of game time) in {elapsed:.2f} s: "
+          f"{args.ticks / elapsed:.0f} ticks/s, player at "
+          f"{world.player.pos}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import importlib.util
+import sys
+import time
+
+
+# Imported by main.py before anything else, so that STARTED is as close to
+# the start of the process as Python lets us get without a wrapper.
+STARTED = time.perf_counter()
+
+# Time from STARTED to the loading screen being on the display that
+# startup is meant to stay under, in ms.
+FIRST_FRAME_TARGET_MS = 200
+
+
+# Returns a module that is only imported when one of its attributes is
+# first used, for modules that are slow to import and not needed to put the
+# first frame up, such as grpc and the generated protobuf code.
+#
+# Bundlers such as PyInstaller only see import statements, so a module
+# imported this way is also imported under typing.TYPE_CHECKING, which is
+# never true when the game runs. Otherwise a frozen build leaves it out,
+# and this raises ImportError.
+def lazy_import(name):
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}", name=name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Time spent in each step of starting the game, in the order they happened.
+# Run Python with -X importtime for the breakdown of the imports.
+class StartupReport:
+    def __init__(self, started=STARTED):
+        self.started = started
+        self.last = started
+        self.steps = []
+        self.first_frame_ms = None
+
+    # Records the time since the previous step as the time of this one.
+    def step(self, name):
+        now = time.perf_counter()
+        self.steps.append((name, (now - self.last) * 1000))
+        self.last = now
+
+    def first_frame(self):
+        self.step('first frame')
+        self.first_frame_ms = (self.last - self.started) * 1000
+
+    def print(self, file=sys.stderr):
+        for name, ms in self.steps:
+            print(f"{name:>20}: {ms:7.1f} ms", file=file)
+        print(f"{'total':>20}: {(self.last - self.started) * 1000:7.1f} ms",
+              file=file)
+        if self.first_frame_ms is not None:
+            verdict = "over" if self.first_frame_ms > FIRST_FRAME_TARGET_MS \
+                else "within"
+            print(f"Time to first frame {self.first_frame_ms:.1f} ms, "
+                  f"{verdict} the target of {FIRST_FRAME_TARGET_MS} ms",
+                  file=file)
@@ -0,0 +1,53 @@
+import modulefinder
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+CLIENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds the frozen game has to keep running for to count as started.
+FROZEN_START_SECONDS = 5
+
+
+# What bundlers see of the game's own modules, which does not include any
+# that are only imported with lazy_import.
+def test_lazily_imported_modules_are_visible_to_bundlers():
+    finder = modulefinder.ModuleFinder(path=[CLIENT_DIR])
+    finder.run_script(os.path.join(CLIENT_DIR, 'main.py'))
+    for name in ['connection', 'game_pb2', 'game_pb2_grpc', 'map',
+                 'network']:
+        assert name in finder.modules
+
+
+# Freezes the game with PyInstaller and checks that it starts, headless and
+# without a server, which it does not need to put the loading screen up.
+def test_frozen_build_starts(tmp_path):
+    pytest.importorskip('PyInstaller')
+    subprocess.run(
+        [sys.executable, '-m', 'PyInstaller', '--noconfirm',
+         '--log-level', 'ERROR',
+         '--distpath', str(tmp_path / 'dist'),
+         '--workpath', str(tmp_path / 'build'),
+         '--specpath', str(tmp_path),
+         '--add-data',
+         f"{os.path.join(CLIENT_DIR, 'assets')}{os.pathsep}assets",
+         os.path.join(CLIENT_DIR, 'main.py')],
+        check=True, capture_output=True)
+
+    executable = tmp_path / 'dist' / 'main' / 'main'
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy')
+    game = subprocess.Popen(
+        [str(executable), '--asset-cache', str(tmp_path / 'cache')],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    try:
+        output, _ = game.communicate(timeout=FROZEN_START_SECONDS)
+    except subprocess.TimeoutExpired:
+        return
+    finally:
+        game.kill()
+        game.wait()
+    pytest.fail(f"Frozen game exited with {game.returncode}:\n"
+                f"{output.decode(errors='replace')}")
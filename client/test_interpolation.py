@@ -0,0 +1,91 @@
+import pytest
+
+import game_pb2
+from interpolation import RemotePlayers, SnapshotBuffer
+
+
+# A player walking right one tile every 100 ms, stopping at x=5 at 400 ms.
+def walking_buffer():
+    buffer = SnapshotBuffer()
+    for i in range(5):
+        buffer.add(i * 100, i + 1, 3, game_pb2.Position.RIGHT)
+    return buffer
+
+
+def test_sample_interpolates_between_snapshots():
+    buffer = walking_buffer()
+    assert buffer.sample(150) == (2.5, 3, game_pb2.Position.RIGHT)
+    assert buffer.sample(-50) == (1, 3, game_pb2.Position.RIGHT)
+
+
+def test_sample_switches_facing_halfway():
+    buffer = SnapshotBuffer()
+    buffer.add(0, 0, 0, game_pb2.Position.UP)
+    buffer.add(100, 0, 0, game_pb2.Position.DOWN)
+    assert buffer.sample(40)[2] == game_pb2.Position.UP
+    assert buffer.sample(60)[2] == game_pb2.Position.DOWN
+
+
+def test_sample_extrapolates_for_a_while():
+    buffer = walking_buffer()
+    x, y, _facing = buffer.sample(400 + 250, max_extrapolation=250)
+    assert (x, y) == pytest.approx((7.5, 3))
+
+
+# No update comes once the player stops, so the extrapolated position has
+# to come back to where it was last seen.
+@pytest.mark.parametrize('time', [400 + 500, 1000, 5000])
+def test_sample_returns_to_last_snapshot_after_silence(time):
+    buffer = walking_buffer()
+    assert buffer.sample(time, max_extrapolation=250) == \
+        (5, 3, game_pb2.Position.RIGHT)
+
+
+def test_sample_eases_back_after_extrapolating():
+    buffer = walking_buffer()
+    x, _y, _facing = buffer.sample(400 + 375, max_extrapolation=250)
+    assert x == pytest.approx(6.25)
+
+
+def test_add_ignores_snapshots_out_of_order():
+    buffer = walking_buffer()
+    buffer.add(50, 100, 100, game_pb2.Position.LEFT)
+    assert buffer.latest() == (400, 5, 3, game_pb2.Position.RIGHT)
+
+
+def player(player_id, x, y):
+    return game_pb2.PlayerState(
+        player_id=player_id,
+        position=game_pb2.Position(x=x, y=y, facing=game_pb2.Position.DOWN))
+
+
+def test_remote_players_hold_players_left_out_of_an_update():
+    players = RemotePlayers(delay=0)
+    players.apply(game_pb2.GameStateUpdate(
+        players=[player(1, 0, 0), player(2, 5, 5)]), 0)
+    players.apply(game_pb2.GameStateUpdate(players=[player(1, 1, 0)]), 100)
+    positions = players.positions(1000)
+    assert positions[1][:2] == (1, 0)
+    assert positions[2][:2] == (5, 5)
+
+
+def test_remote_players_leave_out_local_player():
+    players = RemotePlayers(delay=0)
+    players.apply(game_pb2.GameStateUpdate(
+        players=[player(0, 0, 0), player(1, 1, 1)]), 0, local_player_id=0)
+    assert list(players.positions(0)) == [1]
+
+
+def test_remote_players_start_over_when_entering_view():
+    players = RemotePlayers(delay=0)
+    players.apply(game_pb2.GameStateUpdate(players=[player(1, 0, 0)]), 0)
+    players.apply(game_pb2.GameStateUpdate(
+        players=[player(1, 20, 0)], entered_player_ids=[1]), 100)
+    assert players.positions(50)[1][:2] == (20, 0)
+
+
+def test_remote_players_drop_players_that_left():
+    players = RemotePlayers(delay=0)
+    players.apply(game_pb2.GameStateUpdate(players=[player(1, 0, 0)]), 0)
+    players.apply(game_pb2.GameStateUpdate(left_player_ids=[1]), 100)
+    assert players.positions(100) == {}
@@ -0,0 +1,61 @@
+from prediction import MovementPredictor
+
+
+# Moves along a line, except that nothing can pass 10.
+def step(pos, moves):
+    return min(pos + sum(moves), 10)
+
+
+def test_apply_moves_and_numbers_inputs():
+    predictor = MovementPredictor(step)
+    assert predictor.apply(0, (1,)) == 1
+    assert predictor.apply(1, (2,)) == 3
+    assert predictor.sequence == 2
+    assert list(predictor.pending) == [(1, (1,)), (2, (2,))]
+
+
+def test_reconcile_agreeing_with_prediction_changes_nothing():
+    predictor = MovementPredictor(step)
+    pos = 0
+    for _ in range(3):
+        pos = predictor.apply(pos, (1,))
+    # The server has seen the first input only.
+    assert predictor.reconcile(pos, 1, 1) == 3
+    assert predictor.corrections == 0
+    assert [sequence for sequence, _moves in predictor.pending] == [2, 3]
+
+
+def test_reconcile_replays_unacknowledged_inputs_on_server_state():
+    predictor = MovementPredictor(step)
+    pos = 0
+    for _ in range(3):
+        pos = predictor.apply(pos, (1,))
+    # The server put the player somewhere else after the first input.
+    assert predictor.reconcile(pos, 5, 1) == 7
+    assert predictor.corrections == 1
+
+
+def test_reconcile_replays_through_step():
+    predictor = MovementPredictor(step)
+    pos = predictor.apply(0, (1,))
+    pos = predictor.apply(pos, (1,))
+    assert predictor.reconcile(pos, 9, 1) == 10
+
+
+def test_reconcile_ignores_stale_acknowledgements():
+    predictor = MovementPredictor(step)
+    pos = 0
+    for _ in range(3):
+        pos = predictor.apply(pos, (1,))
+    predictor.reconcile(pos, 2, 2)
+    assert predictor.reconcile(pos, 0, 1) == pos
+    assert predictor.acknowledged == 2
+
+
+def test_pending_inputs_are_bounded():
+    predictor = MovementPredictor(step, capacity=4)
+    pos = 0
+    for _ in range(6):
+        pos = predictor.apply(pos, (0,))
+    assert [sequence for sequence, _moves in predictor.pending] == \
+        [3, 4, 5, 6]
@@ -0,0 +1,161 @@
+import pytest
+
+from scheduler import CATCH_UP_ALL, CATCH_UP_NONE, CATCH_UP_SKIP, \
+    MAX_MISSED_RUNS, Scheduler
+
+
+class Clock:
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+def recorder(runs):
+    def action(event, timestamp):
+        runs.append(timestamp)
+    return action
+
+
+def test_one_shot_runs_once_after_delay():
+    scheduler = Scheduler(Clock())
+    runs = []
+    event = scheduler.schedule(recorder(runs), 10)
+    scheduler.run_due(9)
+    assert runs == []
+    scheduler.run_due(11)
+    scheduler.run_due(50)
+    assert runs == [11]
+    assert event.cancelled
+    assert len(scheduler) == 0
+
+
+def test_events_run_in_due_order_and_ties_in_schedule_order():
+    scheduler = Scheduler(Clock())
+    order = []
+    scheduler.schedule(lambda event, now: order.append('late'), 20)
+    scheduler.schedule(lambda event, now: order.append('first'), 10)
+    scheduler.schedule(lambda event, now: order.append('second'), 10)
+    scheduler.run_due(100)
+    assert order == ['first', 'second', 'late']
+
+
+def test_periodic_catch_up_none_restarts_from_now():
+    scheduler = Scheduler(Clock())
+    runs = []
+    event = scheduler.schedule(recorder(runs), 10, 10, CATCH_UP_NONE)
+    scheduler.run_due(55)
+    assert runs == [55]
+    assert event.due == 65
+
+
+def test_periodic_catch_up_skip_keeps_schedule():
+    scheduler = Scheduler(Clock())
+    runs = []
+    event = scheduler.schedule(recorder(runs), 10, 10, CATCH_UP_SKIP)
+    scheduler.run_due(55)
+    assert runs == [55]
+    assert event.due == 60
+
+
+def test_periodic_catch_up_skip_runs_when_due_exactly_now():
+    scheduler = Scheduler(Clock())
+    runs = []
+    event = scheduler.schedule(recorder(runs), 10, 10, CATCH_UP_SKIP)
+    scheduler.run_due(20)
+    assert runs == [20]
+    assert event.due == 30
+    scheduler.run_due(30)
+    assert runs == [20, 30]
+    assert event.due == 40
+
+
+def test_periodic_catch_up_all_runs_missed_runs_at_their_due_times():
+    scheduler = Scheduler(Clock())
+    runs = []
+    scheduler.schedule(recorder(runs), 10, 10, CATCH_UP_ALL)
+    scheduler.run_due(45)
+    assert runs == [10, 20, 30, 40]
+    scheduler.run_due(65)
+    assert runs[4:] == [50, 60]
+
+
+def test_periodic_catch_up_all_is_capped():
+    scheduler = Scheduler(Clock())
+    runs = []
+    scheduler.schedule(recorder(runs), 10, 10, CATCH_UP_ALL)
+    scheduler.run_due(200)
+    assert len(runs) == MAX_MISSED_RUNS
+    assert runs == list(range(200 - (MAX_MISSED_RUNS - 1) * 10, 201, 10))
+
+
+def test_bad_period_is_refused():
+    with pytest.raises(ValueError):
+        Scheduler(Clock()).schedule(recorder([]), 10, 0)
+
+
+def test_cancelled_event_does_not_run():
+    scheduler = Scheduler(Clock())
+    runs = []
+    event = scheduler.schedule(recorder(runs), 10, 10)
+    event.cancel()
+    scheduler.run_due(100)
+    assert runs == []
+    assert len(scheduler) == 0
+
+
+def test_event_can_cancel_itself():
+    scheduler = Scheduler(Clock())
+    runs = []
+
+    def action(event, now):
+        runs.append(now)
+        event.cancel()
+    scheduler.schedule(action, 10, 10)
+    scheduler.run_due(20)
+    scheduler.run_due(40)
+    assert runs == [20]
+    assert len(scheduler) == 0
+
+
+def test_cancelling_most_events_compacts_heap():
+    scheduler = Scheduler(Clock())
+    events = [scheduler.schedule(recorder([]), i, 10) for i in range(10)]
+    for event in events[:6]:
+        event.cancel()
+    assert len(scheduler.heap) == 4
+    assert scheduler.cancelled == 0
+    assert len(scheduler) == 4
+
+
+def test_cancelling_during_run_due_keeps_other_events():
+    scheduler = Scheduler(Clock())
+    runs = []
+    others = [scheduler.schedule(recorder([]), 50 + i, 10)
+              for i in range(5)]
+
+    def cancel_others(event, now):
+        for other in others:
+            other.cancel()
+    scheduler.schedule(cancel_others, 10)
+    kept = scheduler.schedule(recorder(runs), 20)
+    scheduler.run_due(30)
+    assert runs == [30]
+    assert kept.cancelled
+    assert len(scheduler) == 0
+
+
+def test_clear_cancels_everything():
+    scheduler = Scheduler(Clock())
+    events = [scheduler.schedule(recorder([]), 10, 10) for _ in range(3)]
+    scheduler.clear()
+    assert len(scheduler) == 0
+    assert all(event.cancelled for event in events)
+
+
+def test_delay_is_from_clock():
+    clock = Clock()
+    clock.time = 100
+    event = Scheduler(clock).schedule(recorder([]), 10)
+    assert event.due == 110
@@ -1,25 +1,190 @@
+import math
 import random
 
-from geometry import Direction, Point
+import numpy as np
+
+from flowfield import FlowField
+from geometry import Direction, pdist, Point
+from hpa import PathHierarchy
+from pathcache import PathCache
 from player import Player
 
 
+# Terrain codes, which match the Map.Cell values in game.proto, and the
+# characters they are written as in ASCII maps.
+EMPTY = 0
+TREE = 1
+TILE_CHARS = '.#'
+
+_CHAR_TO_TILE = np.zeros(256, dtype=np.uint8)
+_CHAR_TO_TILE[ord('#')] = TREE
+
+# Width and height, in tiles, of the buckets of the character index.
+SPATIAL_BUCKET_TILES = 8
+
+
+# Uniform grid index of the characters in a world. Characters are kept both
+# by the tile they stand on, for occupancy checks, and by square bucket of
+# tiles, so that area queries only look at the buckets they overlap. A
+# Character added to it keeps it up to date whenever its pos changes.
+class SpatialHash:
+    def __init__(self, bucket_size=SPATIAL_BUCKET_TILES):
+        self.bucket_size = bucket_size
+        self.tiles = {}
+        self.buckets = {}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _bucket(self, pos):
+        return pos.x // self.bucket_size, pos.y // self.bucket_size
+
+    def _insert(self, character, pos):
+        self.tiles.setdefault(pos, set()).add(character)
+        self.buckets.setdefault(self._bucket(pos), set()).add(character)
+
+    def _discard(self, character, pos):
+        for table, key in [(self.tiles, pos),
+                           (self.buckets, self._bucket(pos))]:
+            entries = table[key]
+            entries.discard(character)
+            if not entries:
+                del table[key]
+
+    def add(self, character):
+        if character.spatial_index is self:
+            return
+        self._insert(character, character.pos)
+        character.spatial_index = self
+        self.count += 1
+
+    def remove(self, character):
+        if character.spatial_index is not self:
+            return
+        self._discard(character, character.pos)
+        character.spatial_index = None
+        self.count -= 1
+
+    def move(self, character, old, new):
+        if old == new:
+            return
+        self._discard(character, old)
+        self._insert(character, new)
+
+    def at(self, pos):
+        return self.tiles.get(pos, set())
+
+    def is_occupied(self, pos):
+        return pos in self.tiles
+
+    # Characters standing in the given rectangle of tiles.
+    def in_rect(self, x, y, width, height):
+        found = []
+        size = self.bucket_size
+        for bx in range(x // size, (x + width - 1) // size + 1):
+            for by in range(y // size, (y + height - 1) // size + 1):
+                for character in self.buckets.get((bx, by), ()):
+                    pos = character.pos
+                    if x <= pos.x < x + width and y <= pos.y < y + height:
+                        found.append(character)
+        return found
+
+    # Characters within the given distance of pos.
+    def in_radius(self, pos, radius):
+        reach = math.floor(radius)
+        candidates = self.in_rect(pos.x - reach, pos.y - reach,
+                                  2 * reach + 1, 2 * reach + 1)
+        return [character for character in candidates
+                if pdist(character.pos, pos) <= radius]
+
+
 class World:
     def __init__(self, map, N_GROUND_TILES=1):
-        self.MAP = map
-        self.WIDTH_TILES = len(self.MAP[0])
-        self.HEIGHT_TILES = len(self.MAP)
+        # The map is either a 2D array of terrain codes or, as in ASCII
+        # maps, a list of equal length strings.
+        if isinstance(map, np.ndarray):
+            self.terrain = map.astype(np.uint8, copy=False)
+        else:
+            rows = ''.join(map).encode('latin-1')
+            self.terrain = _CHAR_TO_TILE[
+                np.frombuffer(rows, dtype=np.uint8)].reshape(len(map), -1)
+        self.HEIGHT_TILES, self.WIDTH_TILES = self.terrain.shape
         self.N_GROUND_TILES = N_GROUND_TILES
 
-        self.GROUND_LAYER = [[{} for x in range(self.WIDTH_TILES)]
-                             for y in range(self.HEIGHT_TILES)]
+        # Bumped on every change to the terrain, so that anything derived
+        # from the map (cached paths, rendered chunks) knows to throw it away.
+        self.map_version = 0
+        self.path_cache = PathCache()
+        self.path_hierarchies = {}
+        self.flow_fields = {}
 
-        for x in range(self.WIDTH_TILES):
-            for y in range(self.HEIGHT_TILES):
-                self.GROUND_LAYER[y][x]['tileidx'] = \
-                    random.randint(0, self.N_GROUND_TILES-1)
+        self.ground = np.random.randint(
+            0, self.N_GROUND_TILES, size=self.terrain.shape, dtype=np.uint8)
 
+        self.characters = SpatialHash()
         self.player = Player(Point(23, 22), Direction.DOWN)
+        self.add_character(self.player)
+
+    # The terrain as a list of ASCII rows. This is built on every access.
+    @property
+    def MAP(self):
+        return [''.join(TILE_CHARS[tile] for tile in row)
+                for row in self.terrain.tolist()]
+
+    def set_tile(self, pos, tile):
+        self.terrain[pos.y, pos.x] = TILE_CHARS.index(tile)
+        self.map_version += 1
+        for hierarchy in self.path_hierarchies.values():
+            hierarchy.invalidate(pos)
+
+    @staticmethod
+    def _passability_key(impassable):
+        # Characters of the same class share derived path data.
+        return impassable if isinstance(impassable, str) else type(impassable)
+
+    def path_hierarchy(self, impassable):
+        key = self._passability_key(impassable)
+        hierarchy = self.path_hierarchies.get(key)
+        if hierarchy is None:
+            hierarchy = PathHierarchy(self, impassable)
+            self.path_hierarchies[key] = hierarchy
+        return hierarchy
+
+    def flow_field(self, impassable, target=None):
+        key = (self._passability_key(impassable), target)
+        field = self.flow_fields.get(key)
+        if field is None:
+            field = FlowField(self, impassable)
+            self.flow_fields[key] = field
+        return field
+
+    # Boolean mask of the cells whose tile is one of the given characters.
+    def tile_mask(self, tiles):
+        codes = [TILE_CHARS.index(tile) for tile in tiles
+                 if tile in TILE_CHARS]
+        return np.isin(self.terrain, codes)
+
+    def passable_mask(self, impassable=''):
+        return ~self.tile_mask(impassable)
+
+    # Views of the terrain and ground layers over the part of the given
+    # rectangle that lies inside the world, along with that part's origin.
+    def region(self, x, y, width, height):
+        x0, y0 = max(0, x), max(0, y)
+        x1 = min(self.WIDTH_TILES, x + width)
+        y1 = min(self.HEIGHT_TILES, y + height)
+        return (self.terrain[y0:y1, x0:x1], self.ground[y0:y1, x0:x1],
+                Point(x0, y0))
+
+    def add_character(self, character):
+        self.characters.add(character)
+
+    def remove_character(self, character):
+        self.characters.remove(character)
+
+    def is_occupied(self, pos):
+        return self.characters.is_occupied(pos)
 
     def random_point(self):
         x = random.randint(0, self.WIDTH_TILES - 1)
@@ -33,7 +198,8 @@ class World:
         return True
 
     def is_tree(self, pos):
-        return self.in_world_bounds(pos) and self.MAP[pos.y][pos.x] == '#'
+        return self.in_world_bounds(pos) and \
+            self.terrain.item(pos.y, pos.x) == TREE
 
     def can_move_to(self, pos):
         if not self.in_world_bounds(pos):
@@ -3,11 +3,15 @@ use tonic::{transport::Server, Code, Request, Response, Status};
 use game::game_server::{Game, GameServer};
 use game::{
     GameStateUpdate, Map, PlayGameRequest, PlayGameResponse, PlayerState, Position, Size,
-    StartGameRequest, StartGameResponse,
+    StartGameRequest, StartGameResponse, SubscribeGameRequest,
 };
 
 use rand::Rng;
-use std::sync::Mutex;
+use std::collections::hash_map::DefaultHasher;
+use std::hash::{Hash, Hasher};
+use std::sync::{Arc, Mutex};
+use std::time::Duration;
+use tokio::sync::mpsc;
 
 pub mod map;
 
@@ -15,6 +19,32 @@ pub mod game {
     tonic::include_proto!("game");
 }
 
+const TICK_INTERVAL_MS: u64 = 100;
+
+// Identifies the contents of a map, for Map.hash. DefaultHasher::new always
+// starts from the same keys, so equal maps get equal hashes.
+fn map_hash(map_size: &Size, cells: &[i32]) -> Vec<u8> {
+    let mut hasher = DefaultHasher::new();
+    map_size.width.hash(&mut hasher);
+    map_size.height.hash(&mut hasher);
+    cells.hash(&mut hasher);
+    hasher.finish().to_le_bytes().to_vec()
+}
+
+// The map to send a client that has the map with known_hash, if any: just
+// the hash if that is this map, which the client has already.
+fn map_for_client(map: &Map, known_hash: &[u8]) -> Map {
+    if !known_hash.is_empty() && known_hash == map.hash.as_slice() {
+        Map {
+            map_size: None,
+            cells: vec![],
+            hash: map.hash.clone(),
+        }
+    } else {
+        map.clone()
+    }
+}
+
 #[derive(Debug)]
 struct GameState {
     id: i32,
@@ -26,11 +56,13 @@ impl GameState {}
 
 #[derive(Debug)]
 struct TestGame {
-    games: Mutex<Vec<GameState>>,
+    games: Arc<Mutex<Vec<GameState>>>,
 }
 
 #[tonic::async_trait]
 impl Game for TestGame {
+    type SubscribeGameStream = mpsc::Receiver<Result<GameStateUpdate, Status>>;
+
     async fn start_game(
         &self,
         request: Request<StartGameRequest>,
@@ -100,14 +132,17 @@ impl Game for TestGame {
                 y: playery,
                 facing: 2,
             }),
+            input_sequence: 0,
         };
 
+        let hash = map_hash(&world_size, &cells);
         let map = game::Map {
             map_size: Some(world_size.clone()),
             cells,
+            hash,
         };
 
-        {
+        let game_id = {
             let mut games = self.games.lock().unwrap();
             let ngames = { (*games).len() };
             (*games).push(GameState {
@@ -116,10 +151,11 @@ impl Game for TestGame {
                 players: vec![player],
             });
             println!("Created game id: {}", ngames);
-        }
+            ngames as i32
+        };
 
         let reply = game::StartGameResponse {
-            game_id: 100,
+            game_id,
             world_map: Some(map),
         };
 
@@ -134,14 +170,27 @@ impl Game for TestGame {
 
         println!("Got a request for game id: {}", request.game_id);
 
-        let world_map = {
-            let games = self.games.lock().unwrap();
-            (*games)[request.game_id as usize].map.clone()
-        };
+        let (world_map, players) = {
+            let mut games = self.games.lock().unwrap();
+            let game = match (*games).get_mut(request.game_id as usize) {
+                Some(game) => game,
+                None => return Err(Status::new(Code::NotFound, "No such game")),
+            };
 
-        let players = {
-            let games = self.games.lock().unwrap();
-            (*games)[request.game_id as usize].players.clone()
+            if let Some(update) = request.player_state_update {
+                let players = &mut game.players;
+                match players.iter_mut().find(|p| p.player_id == update.player_id) {
+                    // Updates that arrive out of order are stale.
+                    Some(player) if update.input_sequence < player.input_sequence => {}
+                    Some(player) => *player = update,
+                    None => players.push(update),
+                }
+            }
+
+            (
+                map_for_client(&game.map, &request.known_map_hash),
+                game.players.clone(),
+            )
         };
 
         let reply = game::PlayGameResponse {
@@ -149,18 +198,99 @@ impl Game for TestGame {
             game_state: Some(game::GameStateUpdate {
                 world_map: Some(world_map),
                 players: players,
+                tick: 0,
+                removed_player_ids: vec![],
+                entered_player_ids: vec![],
+                left_player_ids: vec![],
             }),
         };
 
         Ok(Response::new(reply))
     }
+
+    async fn subscribe_game(
+        &self,
+        request: Request<SubscribeGameRequest>,
+    ) -> Result<Response<Self::SubscribeGameStream>, Status> {
+        let request = request.into_inner();
+        let game_id = request.game_id as usize;
+
+        let (world_map, mut sent) = {
+            let games = self.games.lock().unwrap();
+            match (*games).get(game_id) {
+                Some(game) => (
+                    map_for_client(&game.map, &request.known_map_hash),
+                    game.players.clone(),
+                ),
+                None => return Err(Status::new(Code::NotFound, "No such game")),
+            }
+        };
+
+        let (mut tx, rx) = mpsc::channel(4);
+        let games = self.games.clone();
+        tokio::spawn(async move {
+            // The map and every player go out once, after that only the
+            // players that changed since the previous tick.
+            let mut tick = 0;
+            let first = GameStateUpdate {
+                world_map: Some(world_map),
+                players: sent.clone(),
+                tick,
+                removed_player_ids: vec![],
+                entered_player_ids: vec![],
+                left_player_ids: vec![],
+            };
+            if tx.send(Ok(first)).await.is_err() {
+                return;
+            }
+
+            let mut interval = tokio::time::interval(Duration::from_millis(TICK_INTERVAL_MS));
+            loop {
+                interval.tick().await;
+                tick += 1;
+
+                let players = {
+                    let games = games.lock().unwrap();
+                    (*games)[game_id].players.clone()
+                };
+                let changed: Vec<PlayerState> = players
+                    .iter()
+                    .filter(|p| !sent.contains(p))
+                    .cloned()
+                    .collect();
+                let removed: Vec<i32> = sent
+                    .iter()
+                    .filter(|s| !players.iter().any(|p| p.player_id == s.player_id))
+                    .map(|s| s.player_id)
+                    .collect();
+                sent = players;
+
+                if changed.is_empty() && removed.is_empty() {
+                    continue;
+                }
+                let update = GameStateUpdate {
+                    world_map: None,
+                    players: changed,
+                    tick,
+                    removed_player_ids: removed,
+                    entered_player_ids: vec![],
+                    left_player_ids: vec![],
+                };
+                if tx.send(Ok(update)).await.is_err() {
+                    return;
+                }
+            }
+        });
+
+        Ok(Response::new(rx))
+    }
 }
 
 #[tokio::main]
 async fn main() -> Result<(), Box<dyn std::error::Error>> {
     let addr = "[::]:50051".parse()?;
     let game = TestGame {
-        games: Mutex::new(vec![]),
+        games: Arc::new(Mutex::new(vec![])),
     };
 
     Server::builder()